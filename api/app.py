@@ -3,17 +3,30 @@
 import asyncio
 import logging
 import os
+import time
+import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 import uvicorn
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from api.config import CORS_ORIGIN_REGEX, CORS_ORIGINS, REDIS_TIMEOUT
+from api.database import close_db_pool, init_db_pool
+from api.intelligence import close_cache_fill_waiter
+from api.redis_pool import close_redis_pool, init_redis_pool
+from api.responses import ORJSONResponse, json_dumps
+
 # Import routers
 from api.intelligence import router as intelligence_router
-from api.websocket import router as websocket_router, redis_listener
+from api.websocket import (
+    manager as websocket_manager,
+    publish_worker,
+    redis_listener,
+    router as websocket_router,
+)
 from api.demo_routes import router as demo_router
 
 # Configure logging
@@ -25,17 +38,32 @@ logger = logging.getLogger(__name__)
 
 # Background tasks
 background_tasks = set()
+SHUTDOWN_TIMEOUT = 5  # seconds to wait for cancelled tasks
+
+def _on_task_done(task: asyncio.Task):
+    """Stop tracking a finished background task and surface its failure."""
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background task {task.get_name()} stopped: {task.exception()}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
     logger.info("Starting Frontier Tower Event Intelligence...")
     
-    # Try to start Redis listener for WebSocket broadcasts (optional for demo)
+    # Shared Redis pool for health checks, caching, rate limiting and pubsub
+    app.state.redis = await init_redis_pool()
+    
+    # Database pool is created once here rather than by the first request
+    await init_db_pool()
+    
+    # Try to start Redis listener and publisher for WebSocket broadcasts (optional for demo)
     try:
-        task = asyncio.create_task(redis_listener())
-        background_tasks.add(task)
-        logger.info("Redis listener started for WebSocket broadcasts")
+        for worker in (redis_listener, publish_worker):
+            task = asyncio.create_task(worker())
+            background_tasks.add(task)
+            task.add_done_callback(_on_task_done)
+        logger.info("Redis listener and publisher started for WebSocket broadcasts")
     except Exception as e:
         logger.warning(f"Redis not available for WebSocket broadcasts: {e}")
     
@@ -43,58 +71,57 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("Shutting down...")
-    for task in background_tasks:
+    for task in list(background_tasks):
         task.cancel()
-    await asyncio.gather(*background_tasks, return_exceptions=True)
+    if background_tasks:
+        await asyncio.wait(background_tasks, timeout=SHUTDOWN_TIMEOUT)
+    await websocket_manager.close()
+    await close_cache_fill_waiter()
+    await close_db_pool()
+    await close_redis_pool()
 
 # Create FastAPI app
 app = FastAPI(
     title="Frontier Tower Event Intelligence",
     description="AI-powered event analytics and real-time tower intelligence",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://localhost:5173",
-        "https://frontiertower.ai",
-        "*"  # Allow all origins in development
-    ],
+    allow_origins=frozenset(CORS_ORIGINS),
+    allow_origin_regex=CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"]
 )
 
-# Request ID middleware
+# Request tracing and logging middleware
 @app.middleware("http")
-async def add_request_id(request: Request, call_next):
-    """Add request ID for tracing."""
-    import uuid
-    request_id = str(uuid.uuid4())
+async def trace_and_log(request: Request, call_next):
+    """Add request ID for tracing and log all requests."""
+    request_id = uuid.uuid4().hex
     request.state.request_id = request_id
     
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
-
-# Logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all requests."""
-    start_time = datetime.utcnow()
+    if not logger.isEnabledFor(logging.INFO):
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
     
+    start_time = time.perf_counter()
     response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
     
-    process_time = (datetime.utcnow() - start_time).total_seconds() * 1000
     logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Duration: {process_time:.2f}ms"
+        "%s %s - Status: %d - Duration: %.2fms",
+        request.method,
+        request.url.path,
+        response.status_code,
+        (time.perf_counter() - start_time) * 1000,
     )
     
     return response
@@ -105,14 +132,13 @@ async def health_check():
     """Basic health check."""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),
         "service": "frontier-tower-intelligence"
     }
 
 @app.get("/api/health/ready")
-async def readiness_check():
+async def readiness_check(request: Request):
     """Readiness check with dependency status."""
-    import redis.asyncio as redis
     from api.database import test_db_connection
     
     checks = {
@@ -130,9 +156,7 @@ async def readiness_check():
     
     # Check Redis
     try:
-        r = await redis.from_url("redis://localhost:6379")
-        await r.ping()
-        await r.close()
+        await asyncio.wait_for(request.app.state.redis.ping(), REDIS_TIMEOUT)
         checks["redis"] = True
     except Exception as e:
         logger.error(f"Redis check failed: {e}")
@@ -149,42 +173,44 @@ app.include_router(intelligence_router)
 app.include_router(websocket_router)
 app.include_router(demo_router)
 
-# Root endpoint
+# Root endpoint (static, serialized once at import)
+_ROOT_RESPONSE = json_dumps({
+    "service": "Frontier Tower Event Intelligence",
+    "version": "1.0.0",
+    "endpoints": {
+        "health": "/health",
+        "readiness": "/api/health/ready",
+        "intelligence": {
+            "floor_pulse": "/api/floors/{floor_id}/pulse",
+            "community_network": "/api/community/network",
+            "live_analytics": "/api/analytics/live",
+            "revenue_optimization": "/api/revenue/optimization",
+            "bot_query": "/api/bot/query"
+        },
+        "websocket": {
+            "tower_feed": "/ws/tower-feed",
+            "floor_pulse": "/ws/floor-pulse/{floor_id}"
+        }
+    },
+    "documentation": "/docs",
+    "openapi": "/openapi.json"
+})
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
-    return {
-        "service": "Frontier Tower Event Intelligence",
-        "version": "1.0.0",
-        "endpoints": {
-            "health": "/health",
-            "readiness": "/api/health/ready",
-            "intelligence": {
-                "floor_pulse": "/api/floors/{floor_id}/pulse",
-                "community_network": "/api/community/network",
-                "live_analytics": "/api/analytics/live",
-                "revenue_optimization": "/api/revenue/optimization",
-                "bot_query": "/api/bot/query"
-            },
-            "websocket": {
-                "tower_feed": "/ws/tower-feed",
-                "floor_pulse": "/ws/floor-pulse/{floor_id}"
-            }
-        },
-        "documentation": "/docs",
-        "openapi": "/openapi.json"
-    }
+    return Response(content=_ROOT_RESPONSE, media_type="application/json")
 
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc):
     """Handle 404 errors."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={
             "error": "Not Found",
             "message": f"Path {request.url.path} not found",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
     )
 
@@ -192,12 +218,12 @@ async def not_found_handler(request: Request, exc):
 async def internal_error_handler(request: Request, exc):
     """Handle 500 errors."""
     logger.error(f"Internal error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
             "message": "An unexpected error occurred",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
     )
 
@@ -219,5 +245,7 @@ if __name__ == "__main__":
         port=port,
         reload=reload,
         log_level=log_level,
-        access_log=True
+        loop="uvloop",
+        http="httptools",
+        access_log=False  # trace_and_log middleware already logs each request
     )
\ No newline at end of file
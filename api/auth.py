@@ -1,19 +1,94 @@
 """JWT Authentication for Frontier Tower Intelligence API."""
 
+import hashlib
 import logging
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
+from jwt import InvalidTokenError
 
-from api.config import JWT_ALGORITHM, JWT_SECRET
+from api.config import AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL, JWT_ALGORITHM, JWT_SECRET
 
 logger = logging.getLogger(__name__)
 
-# Security scheme
+# Security schemes
 security = HTTPBearer()
+_optional_security = HTTPBearer(auto_error=False)
+
+class VerifiedTokenCache:
+    """TTL cache of verified token claims, keyed by a digest of the token.
+    
+    Entries never outlive the token's own ``exp`` claim, and are dropped after
+    ``ttl`` seconds so revocations take effect within that bound.
+    """
+    
+    def __init__(self, ttl: int = AUTH_CACHE_TTL, max_size: int = AUTH_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[bytes, Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    def get(self, token: str) -> Optional[dict]:
+        """Return cached claims, or None on a miss or stale entry."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return payload
+    
+    def put(self, token: str, payload: dict):
+        """Cache verified claims until min(exp, now + ttl)."""
+        now = time.time()
+        expires_at = now + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= now:
+            return
+        
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._evict(now)
+            self._entries[self._key(token)] = (expires_at, payload)
+    
+    def discard(self, token: str):
+        """Drop a token from the cache."""
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+    
+    def _evict(self, now: float):
+        # Drop stale entries first; fall back to the oldest insertions
+        stale = [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for k in stale:
+            del self._entries[k]
+        while len(self._entries) >= self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+_jwt_cache = VerifiedTokenCache()
+_api_key_cache = VerifiedTokenCache()
+
+def cached_claims(token: str) -> Optional[dict]:
+    """Return a token's verified claims if cached, without verifying it."""
+    return _jwt_cache.get(token)
+
+def invalidate_token(token: str):
+    """Evict a token from the verification caches (e.g. on logout)."""
+    _jwt_cache.discard(token)
+    _api_key_cache.discard(token)
 
 def create_access_token(
     subject: str,
@@ -21,16 +96,13 @@ def create_access_token(
     expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create a JWT access token."""
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(hours=24)
+    now = datetime.now(timezone.utc)
     
     to_encode = {
         "sub": subject,
         "aud": audience,
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "exp": now + (expires_delta or timedelta(hours=24)),
+        "iat": now,
         "type": "access"
     }
     
@@ -39,6 +111,10 @@ def create_access_token(
 
 def decode_token(token: str) -> dict:
     """Decode and validate a JWT token."""
+    payload = _jwt_cache.get(token)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(
             token,
@@ -46,8 +122,9 @@ def decode_token(token: str) -> dict:
             algorithms=[JWT_ALGORITHM],
             audience="frontier-dashboard"
         )
+        _jwt_cache.put(token, payload)
         return payload
-    except JWTError as e:
+    except InvalidTokenError as e:
         logger.error(f"JWT decode error: {e}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,35 +138,19 @@ async def verify_jwt(
     """Verify JWT token from Authorization header."""
     token = credentials.credentials
     
-    try:
-        payload = decode_token(token)
-        
-        # Check expiration
-        exp = payload.get("exp")
-        if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(timezone.utc):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Check audience
-        if payload.get("aud") != "frontier-dashboard":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token audience",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        return payload
-        
-    except JWTError as e:
-        logger.error(f"JWT verification error: {e}")
+    # Expiration is enforced by jwt.decode (and the cache never outlives exp);
+    # decode_token maps invalid tokens to a 401
+    payload = decode_token(token)
+    
+    # Check audience
+    if payload.get("aud") != "frontier-dashboard":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
+            detail="Invalid token audience",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    return payload
 
 async def get_current_user(jwt_payload: dict = Depends(verify_jwt)) -> str:
     """Get current user from JWT payload."""
@@ -120,6 +181,10 @@ def create_api_key(
 
 def verify_api_key(api_key: str) -> dict:
     """Verify an API key."""
+    payload = _api_key_cache.get(api_key)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(
             api_key,
@@ -133,9 +198,10 @@ def verify_api_key(api_key: str) -> dict:
                 detail="Invalid API key"
             )
         
+        _api_key_cache.put(api_key, payload)
         return payload
         
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key"
@@ -143,7 +209,7 @@ def verify_api_key(api_key: str) -> dict:
 
 # Optional auth dependency (allows anonymous access)
 async def optional_jwt(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_optional_security)
 ) -> Optional[dict]:
     """Optional JWT verification - returns None if no token provided."""
     if not credentials:
@@ -1,33 +1,61 @@
 """Database connection management for Frontier Tower Intelligence API."""
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import AsyncGenerator, Optional
 
 import asyncpg
 from asyncpg import Connection, Pool
 
-from api.config import DATABASE_URL, DATABASE_TIMEOUT, IS_PRODUCTION, SQLITE_URL
+from api.config import (
+    DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME,
+    DATABASE_POOL_MAX_SIZE,
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_STATEMENT_CACHE_SIZE,
+    DATABASE_TIMEOUT,
+    DATABASE_URL,
+    IS_PRODUCTION,
+    SQLITE_URL,
+)
 
 logger = logging.getLogger(__name__)
 
-# Connection pool
+# Connection pool (None in mock mode once initialized)
 _pool: Optional[Pool] = None
+_pool_initialized = False
+_pool_lock = asyncio.Lock()
+
+async def _init_connection(conn: Connection):
+    """Per-connection setup: decode NUMERIC columns straight to float."""
+    await conn.set_type_codec(
+        'numeric', encoder=str, decoder=float, schema='pg_catalog', format='text'
+    )
 
 async def init_db_pool():
     """Initialize database connection pool."""
-    global _pool
+    async with _pool_lock:
+        if not _pool_initialized:
+            await _create_pool()
+
+async def _create_pool():
+    global _pool, _pool_initialized
     
     if IS_PRODUCTION:
         # PostgreSQL for production
         try:
             _pool = await asyncpg.create_pool(
                 DATABASE_URL,
-                min_size=5,
-                max_size=20,
+                min_size=DATABASE_POOL_MIN_SIZE,
+                max_size=DATABASE_POOL_MAX_SIZE,
                 timeout=DATABASE_TIMEOUT,
                 command_timeout=DATABASE_TIMEOUT,
+                statement_cache_size=DATABASE_STATEMENT_CACHE_SIZE,
+                max_cached_statement_lifetime=0,
+                max_inactive_connection_lifetime=DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME,
+                init=_init_connection,
             )
             logger.info("PostgreSQL connection pool created")
         except Exception as e:
@@ -43,15 +71,22 @@ async def init_db_pool():
                 min_size=2,
                 max_size=10,
                 timeout=DATABASE_TIMEOUT,
+                statement_cache_size=DATABASE_STATEMENT_CACHE_SIZE,
+                max_cached_statement_lifetime=0,
+                max_inactive_connection_lifetime=DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME,
+                init=_init_connection,
             )
             logger.info("Development PostgreSQL connection pool created")
         except:
             logger.warning("PostgreSQL not available, using mock database")
             _pool = None
+    
+    _pool_initialized = True
 
 async def close_db_pool():
     """Close database connection pool."""
-    global _pool
+    global _pool, _pool_initialized
+    _pool_initialized = False
     if _pool:
         await _pool.close()
         _pool = None
@@ -60,11 +95,8 @@ async def close_db_pool():
 @asynccontextmanager
 async def get_db_connection() -> AsyncGenerator[Connection, None]:
     """Get a database connection from the pool."""
-    global _pool
-    
-    if not _pool:
-        # Initialize pool if not exists
-        await init_db_pool()
+    if not _pool_initialized:
+        raise RuntimeError("Database pool not initialized; call init_db_pool() at startup")
     
     if _pool:
         async with _pool.acquire() as connection:
@@ -102,6 +134,17 @@ async def execute_migration(migration_path: str):
         logger.error(f"Migration failed: {e}")
         raise
 
+@lru_cache(maxsize=256)
+def _mock_scalar(query: str):
+    """Mock scalar for a query, classified once per distinct query string."""
+    if "COUNT" in query:
+        return 0
+    elif "SELECT 1" in query:
+        return 1
+    elif "AVG" in query or "SUM" in query:
+        return 0.0
+    return None
+
 class MockConnection:
     """Mock database connection for development without database."""
     
@@ -114,14 +157,7 @@ class MockConnection:
         """Mock fetchval - returns None or mock value."""
         logger.debug(f"Mock fetchval: {query[:50]}...")
         
-        # Return mock values for specific queries
-        if "COUNT" in query:
-            return 0
-        elif "SELECT 1" in query:
-            return 1
-        elif "AVG" in query or "SUM" in query:
-            return 0.0
-        return None
+        return _mock_scalar(query)
     
     async def fetchrow(self, query, *args):
         """Mock fetchrow - returns None."""
@@ -132,6 +168,17 @@ class MockConnection:
         """Mock execute - does nothing."""
         logger.debug(f"Mock execute: {query[:50]}...")
         return "MOCK"
+    
+    async def cursor(self, query, *args):
+        """Mock cursor - yields no rows."""
+        logger.debug(f"Mock cursor: {query[:50]}...")
+        return
+        yield
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Mock transaction - does nothing."""
+        yield
 
 # Database initialization queries
 INIT_QUERIES = [
@@ -186,9 +233,10 @@ async def init_database():
     """Initialize database with required tables."""
     try:
         async with get_db_connection() as conn:
-            if hasattr(conn, 'execute'):
-                for query in INIT_QUERIES:
-                    await conn.execute(query)
+            if not isinstance(conn, MockConnection):
+                # One multi-statement round trip; IF NOT EXISTS keeps it idempotent
+                async with conn.transaction():
+                    await conn.execute(";\n".join(INIT_QUERIES))
                 logger.info("Database initialized successfully")
             else:
                 logger.warning("Mock mode: Skipping database initialization")
@@ -1,10 +1,14 @@
 """Demo routes for heatmap without authentication."""
 
 import json
+import math
 import random
+import time
 from datetime import datetime
-from typing import List, Dict, Any
-from fastapi import APIRouter
+from typing import Any, Callable, Dict, List, Tuple
+from fastapi import APIRouter, Response
+
+from api.responses import ORJSONResponse, json_dumps, utc_now_iso
 
 router = APIRouter(prefix="/api", tags=["demo"])
 
@@ -94,67 +98,81 @@ DEMO_ROOMS = {
     ]
 }
 
-def generate_dynamic_activity(room_id: str, base_activity: float) -> float:
-    """Generate realistic activity variations."""
-    import time
-    import math
-    
-    current_time = time.time()
-    
-    # Create different patterns for different room types
-    if "booth" in room_id:
-        # Focus pods: shorter, more intense usage cycles
-        cycle = math.sin(current_time / 300) * 0.4  # 5-minute cycles
-    elif "open-space" in room_id:
-        # Collaboration zones: longer activity periods
-        cycle = math.sin(current_time / 1200) * 0.3  # 20-minute cycles
-    elif "lounge" in room_id:
-        # Social spaces: steady with periodic spikes
-        cycle = math.sin(current_time / 900) * 0.25 + math.sin(current_time / 180) * 0.1
-    else:
-        # Default pattern for meeting rooms
-        cycle = math.sin(current_time / 600) * 0.3  # 10-minute cycles
-    
-    # Add some randomness
-    noise = (random.random() - 0.5) * 0.2
-    
-    # Calculate final activity level
-    activity = base_activity + cycle + noise
-    
-    # Clamp to valid range
-    return max(0.05, min(0.95, activity))
+# Activity functions per room pattern: (time, base activity) -> activity before noise
+ActivityFn = Callable[[float, float], float]
+
+_ACTIVITY_FNS: Dict[str, ActivityFn] = {
+    # Focus pods: shorter, more intense usage cycles (5 minutes)
+    "booth": lambda t, base: base + math.sin(t / 300) * 0.4,
+    # Collaboration zones: longer activity periods (20 minutes)
+    "open-space": lambda t, base: base + math.sin(t / 1200) * 0.3,
+    # Social spaces: steady with periodic spikes
+    "lounge": lambda t, base: base + math.sin(t / 900) * 0.25 + math.sin(t / 180) * 0.1,
+}
+
+def _default_activity(t: float, base: float) -> float:
+    # Default pattern for meeting rooms: 10-minute cycles
+    return base + math.sin(t / 600) * 0.3
+
+def activity_fn_for(room_id: str) -> ActivityFn:
+    """Resolve the activity function for a room from its id."""
+    for marker, fn in _ACTIVITY_FNS.items():
+        if marker in room_id:
+            return fn
+    return _default_activity
+
+# floor_id -> [(room_id, base_activity, activity_fn)], resolved once at import
+_ROOM_INDEX = {
+    floor_id: [(room["id"], room["baseActivityHeat"], activity_fn_for(room["id"])) for room in rooms]
+    for floor_id, rooms in DEMO_ROOMS.items()
+}
+
+def _pulse_vector(rooms: List[Tuple[str, float, ActivityFn]]) -> List[float]:
+    """Activity levels for a whole floor from a single clock read."""
+    t = time.time()
+    rand = random.random
+    return [
+        max(0.05, min(0.95, activity_fn(t, base_activity) + (rand() - 0.5) * 0.2))
+        for _, base_activity, activity_fn in rooms
+    ]
 
 @router.get("/floors/{floor_id}/pulse")
-async def get_floor_pulse_demo(floor_id: str) -> Dict[str, Any]:
+async def get_floor_pulse_demo(floor_id: str) -> ORJSONResponse:
     """Get real-time pulse for all rooms on a floor (demo version)."""
     
-    if floor_id not in DEMO_ROOMS:
-        return {
+    rooms = _ROOM_INDEX.get(floor_id)
+    if rooms is None:
+        return ORJSONResponse({
             "error": f"Floor {floor_id} not found",
             "floors": list(DEMO_ROOMS.keys())
-        }
-    
-    rooms = DEMO_ROOMS[floor_id]
+        })
     
-    # Generate dynamic activity levels for each room
+    # Generate dynamic activity levels for each room in a single pass; the
+    # timestamp is formatted once and shared by every room
+    now = utc_now_iso()
     room_activities = {}
-    for room in rooms:
-        activity_level = generate_dynamic_activity(room["id"], room["baseActivityHeat"])
-        room_activities[room["id"]] = {
+    total_activity = 0.0
+    high_activity_rooms = 0
+    for (room_id, _, _), activity_level in zip(rooms, _pulse_vector(rooms)):
+        total_activity += activity_level
+        if activity_level > 0.7:
+            high_activity_rooms += 1
+        room_activities[room_id] = {
             "level": activity_level,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now
         }
     
-    return {
+    # Returned as a response so FastAPI doesn't walk the dict with jsonable_encoder
+    return ORJSONResponse({
         "floorId": floor_id,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now,
         "rooms": room_activities,
         "metadata": {
             "totalRooms": len(rooms),
-            "averageActivity": sum(r["level"] for r in room_activities.values()) / len(rooms),
-            "highActivityRooms": len([r for r in room_activities.values() if r["level"] > 0.7])
+            "averageActivity": total_activity / len(rooms),
+            "highActivityRooms": high_activity_rooms
         }
-    }
+    })
 
 @router.get("/floors")
 async def list_floors() -> Dict[str, Any]:
@@ -167,17 +185,22 @@ async def list_floors() -> Dict[str, Any]:
         }
     }
 
+# Static part of the demo health payload, serialized once; only the timestamp varies
+_DEMO_HEALTH_PREFIX = json_dumps({
+    "status": "healthy",
+    "service": "frontier-tower-heatmap-demo",
+    "features": [
+        "real-time-pulse",
+        "dynamic-activity-simulation",
+        "multi-floor-support",
+        "websocket-ready"
+    ]
+})[:-1] + b',"timestamp":'
+
 @router.get("/health/demo")
 async def demo_health():
     """Demo health check."""
-    return {
-        "status": "healthy",
-        "service": "frontier-tower-heatmap-demo",
-        "timestamp": datetime.utcnow().isoformat(),
-        "features": [
-            "real-time-pulse",
-            "dynamic-activity-simulation", 
-            "multi-floor-support",
-            "websocket-ready"
-        ]
-    }
\ No newline at end of file
+    return Response(
+        content=_DEMO_HEALTH_PREFIX + json_dumps(datetime.utcnow()) + b"}",
+        media_type="application/json"
+    )
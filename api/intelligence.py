@@ -1,35 +1,100 @@
 """Frontier Tower Event Intelligence API."""
 
+import asyncio
 import hashlib
-import json
+import logging
+import re
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
+import orjson
 import redis.asyncio as redis
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, Field
+from redis.exceptions import NoScriptError
 
 from api.auth import verify_jwt
 from api.database import get_db_connection
+from api.redis_pool import redis_dep
+from api.responses import json_dumps
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["intelligence"])
 
-# Redis client
-redis_client: Optional[redis.Redis] = None
+# Rate limiting: (limit, window seconds) per bucket, shared by all paths of an endpoint
+BUCKET_IDS = {
+    "floor_pulse": (180, 60),      # 180 requests per minute
+    "analytics_live": (240, 60),   # 240 requests per minute
+    "bot_query": (15, 60),         # 15 requests per minute per chat
+}
+
+# Redis key prefix per bucket, built once
+_RATE_KEY_PREFIXES = {bucket: f"rl:{bucket}:" for bucket in BUCKET_IDS}
 
-async def get_redis():
-    global redis_client
-    if not redis_client:
-        redis_client = await redis.from_url("redis://localhost:6379", decode_responses=True)
-    return redis_client
+# Buckets limited per process with a token bucket instead of a Redis counter
+LOCAL_RATE_LIMITS = {"bot_query"}
+LOCAL_BUCKETS_MAX_SIZE = 10_000
 
-# Rate limiting
-RATE_LIMITS = {
-    "/api/floors/*/pulse": (180, 60),  # 180 requests per minute
-    "/api/analytics/live": (240, 60),   # 240 requests per minute
-    "/api/bot/query": (15, 60),         # 15 requests per minute per chat
-}
+class TokenBucketLimiter:
+    """In-process token buckets keyed by rate-limit key.
+    
+    Each bucket holds up to ``limit`` tokens and refills at ``limit / window``
+    tokens per second. The sustained rate matches the Redis limit, but a full
+    bucket plus refill admits up to about ``2 * limit`` in a key's first window.
+    
+    At most ``max_size`` buckets are kept; the least recently used is evicted,
+    which only resets that key to a full bucket.
+    """
+    
+    def __init__(self, max_size: int = LOCAL_BUCKETS_MAX_SIZE):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    def allow(self, key: str, limit: int, window: int) -> bool:
+        """Consume one token for key, returning False if the bucket is empty."""
+        now = time.monotonic()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            tokens = float(limit)
+            if len(self._buckets) >= self.max_size:
+                self._buckets.popitem(last=False)
+        else:
+            tokens, last = bucket
+            tokens = min(float(limit), tokens + (now - last) * limit / window)
+        
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        return allowed
+
+_token_buckets = TokenBucketLimiter()
+
+# Fixed-window counter: INCR and start the window on the first hit, atomically
+RATE_LIMIT_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+RATE_LIMIT_SHA = hashlib.sha1(RATE_LIMIT_SCRIPT.encode()).hexdigest()
+
+# Release a cache-fill lock only if it still holds this request's token; a lock
+# that expired mid-compute may already belong to another request
+UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+UNLOCK_SHA = hashlib.sha1(UNLOCK_SCRIPT.encode()).hexdigest()
 
 # Cache TTLs
 CACHE_TTLS = {
@@ -40,6 +105,17 @@ CACHE_TTLS = {
     "intel:revenue": 60,    # 1 minute
 }
 
+# Lookback windows for live analytics
+_ONE_DAY = timedelta(hours=24)
+_SEVEN_DAYS = timedelta(days=7)
+
+# Single-flight cache fills: how long a fill lock lives and how long others wait for it
+CACHE_LOCK_TTL_MS = 3000
+CACHE_WAIT_TIMEOUT = 3.0
+CACHE_READY_PREFIX = "cache-ready:"
+# Idle waits on the fill subscription stay below the Redis socket timeout
+CACHE_FILL_IDLE_TIMEOUT = 1.0
+
 # Models
 class RoomEvent(BaseModel):
     id: str
@@ -126,289 +202,481 @@ class BotResponse(BaseModel):
     suggestions: List[str]
 
 # Helper functions
-async def cache_get(key: str) -> Optional[str]:
-    r = await get_redis()
+async def _fetch(query: str, *args) -> list:
+    """Run a query on its own pooled connection (for concurrent fan-out)."""
+    async with get_db_connection() as conn:
+        return await conn.fetch(query, *args)
+
+async def _fetchval(query: str, *args) -> Any:
+    """Fetch a single value on its own pooled connection (for concurrent fan-out)."""
+    async with get_db_connection() as conn:
+        return await conn.fetchval(query, *args)
+
+def json_response(payload: bytes) -> Response:
+    """Wrap an already-serialized JSON payload without re-encoding it."""
+    return Response(content=payload, media_type="application/json")
+
+async def cache_get(r: redis.Redis, key: str) -> Optional[bytes]:
     return await r.get(key)
 
-async def cache_set(key: str, value: str, ttl: int):
-    r = await get_redis()
+async def cache_set(r: redis.Redis, key: str, value: bytes, ttl: int):
     await r.setex(key, ttl, value)
 
-async def check_rate_limit(path: str, identifier: str) -> bool:
-    r = await get_redis()
-    key = f"rate:{path}:{identifier}"
+async def _evalsha(r: redis.Redis, script: str, sha: str, numkeys: int, *keys_and_args) -> Any:
+    """Run a Lua script by SHA, loading it first if Redis doesn't have it cached."""
+    try:
+        return await r.evalsha(sha, numkeys, *keys_and_args)
+    except NoScriptError:
+        await r.script_load(script)
+        return await r.evalsha(sha, numkeys, *keys_and_args)
+
+class CacheFillWaiter:
+    """Waits for cache fills published by other processes.
+    
+    One pattern subscription on cache-ready:* serves every waiting request, so
+    a stampede holds a single pubsub connection per process rather than one
+    per waiter.
+    """
+    
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._starting = asyncio.Lock()
+    
+    async def wait(self, r: redis.Redis, key: str) -> Optional[bytes]:
+        """Wait for a fill of key, or give up after the timeout."""
+        await self._subscribe(r)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, set()).add(future)
+        try:
+            # The fill may have landed before this waiter registered
+            cached = await r.get(key)
+            if cached:
+                return cached
+            return await asyncio.wait_for(future, CACHE_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            return await r.get(key)
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[key]
+    
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    async def _subscribe(self, r: redis.Redis):
+        if self._task is not None and not self._task.done():
+            return
+        async with self._starting:
+            if self._task is not None and not self._task.done():
+                return
+            pubsub = r.pubsub()
+            await pubsub.psubscribe(CACHE_READY_PREFIX + "*")
+            self._task = asyncio.create_task(self._listen(pubsub))
+    
+    async def _listen(self, pubsub):
+        # On a Redis error the subscription ends; pending waiters time out and
+        # re-read the cache, and the next wait() subscribes again
+        try:
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=CACHE_FILL_IDLE_TIMEOUT
+                )
+                if message is None or message["type"] != "pmessage":
+                    continue
+                key = message["channel"][len(CACHE_READY_PREFIX):].decode()
+                for future in self._waiters.get(key, ()):
+                    if not future.done():
+                        future.set_result(message["data"])
+        except redis.RedisError as e:
+            logger.warning(f"Cache fill subscription lost: {e}")
+        finally:
+            await pubsub.aclose()
+
+_fill_waiter = CacheFillWaiter()
+
+async def close_cache_fill_waiter():
+    """Stop the shared cache-fill subscription (called at shutdown)."""
+    await _fill_waiter.close()
+
+# In-process fills by cache key, so concurrent misses in one process share one fill
+_inflight_fills: Dict[str, asyncio.Task] = {}
+
+async def compute_once(
+    r: redis.Redis, key: str, ttl: int, compute: Callable[[], Awaitable[bytes]]
+) -> bytes:
+    """Fill a missed cache entry, letting only one request hit the database.
+    
+    Concurrent misses in this process share a single fill. Across processes,
+    the first takes a short NX lock, computes the payload, caches it and
+    publishes it on cache-ready:<key>; the others wait for that message and
+    only compute themselves if it doesn't arrive in time.
+    """
+    fill = _inflight_fills.get(key)
+    if fill is None:
+        fill = asyncio.create_task(_fill_cache(r, key, ttl, compute))
+        _inflight_fills[key] = fill
+        fill.add_done_callback(lambda _: _inflight_fills.pop(key, None))
+    # A cancelled request must not cancel the fill other requests are waiting on
+    return await asyncio.shield(fill)
+
+async def _fill_cache(
+    r: redis.Redis, key: str, ttl: int, compute: Callable[[], Awaitable[bytes]]
+) -> bytes:
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    
+    if not await r.set(lock_key, token, nx=True, px=CACHE_LOCK_TTL_MS):
+        payload = await _fill_waiter.wait(r, key)
+        if payload:
+            return payload
+        # The lock holder failed or stalled: compute independently
+        payload = await compute()
+        await cache_set(r, key, payload, ttl)
+        return payload
     
-    for pattern, (limit, window) in RATE_LIMITS.items():
-        if pattern.replace("*", "") in path:
-            count = await r.incr(key)
-            if count == 1:
-                await r.expire(key, window)
-            return count <= limit
-    return True
+    try:
+        payload = await compute()
+    except Exception:
+        await _evalsha(r, UNLOCK_SCRIPT, UNLOCK_SHA, 1, lock_key, token)
+        raise
+    
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.setex(key, ttl, payload)
+        pipe.publish(CACHE_READY_PREFIX + key, payload)
+        pipe.evalsha(UNLOCK_SHA, 1, lock_key, token)
+        results = await pipe.execute(raise_on_error=False)
+    
+    for result in results[:-1]:
+        if isinstance(result, Exception):
+            raise result
+    if isinstance(results[-1], NoScriptError):
+        await _evalsha(r, UNLOCK_SCRIPT, UNLOCK_SHA, 1, lock_key, token)
+    elif isinstance(results[-1], Exception):
+        raise results[-1]
+    return payload
+
+async def cached_or_compute(
+    r: redis.Redis, key: str, ttl: int, compute: Callable[[], Awaitable[bytes]]
+) -> bytes:
+    """Return the cached payload for key, computing it once on a miss."""
+    cached = await cache_get(r, key)
+    if cached:
+        return cached
+    return await compute_once(r, key, ttl, compute)
+
+async def _begin_pipeline(
+    r: redis.Redis,
+    rate_limit: Optional[Tuple[int, int]],
+    rate_key: str,
+    cache_key: str
+) -> list:
+    async with r.pipeline(transaction=False) as pipe:
+        if rate_limit:
+            pipe.evalsha(RATE_LIMIT_SHA, 1, rate_key, rate_limit[1] * 1000)
+        pipe.get(cache_key)
+        return await pipe.execute()
+
+async def begin_request(
+    r: redis.Redis, bucket: str, identifier: str, cache_key: str
+) -> Tuple[bool, Optional[bytes]]:
+    """Count a request against its rate limit and look up its cache entry.
+    
+    Both happen in a single pipelined round trip. Returns (allowed, cached payload).
+    """
+    rate_limit = BUCKET_IDS[bucket]
+    rate_key = _RATE_KEY_PREFIXES[bucket] + identifier
+    
+    if bucket in LOCAL_RATE_LIMITS:
+        if not _token_buckets.allow(rate_key, *rate_limit):
+            return False, None
+        rate_limit = None  # already counted locally; only the cache lookup remains
+    
+    try:
+        results = await _begin_pipeline(r, rate_limit, rate_key, cache_key)
+    except NoScriptError:
+        # Script cache is empty (first use or Redis restart): load once and retry
+        await r.script_load(RATE_LIMIT_SCRIPT)
+        results = await _begin_pipeline(r, rate_limit, rate_key, cache_key)
+    
+    allowed = rate_limit is None or results[0] <= rate_limit[0]
+    return allowed, results[-1]
 
 # Endpoints
-@router.get("/floors/{floor_id}/pulse", response_model=List[RoomPulse])
+def _room_utilization(attendee_count: Optional[int], capacity: int) -> float:
+    """Share of a room's capacity in use, capped at 1.0; 0.0 for an empty room."""
+    if not attendee_count or capacity <= 0:
+        return 0.0
+    return min(attendee_count / capacity, 1.0)
+
+def _room_pulse(room) -> Dict[str, Any]:
+    """Pulse for one room row joined with its current event (if any)."""
+    has_event = room['event_id'] is not None
+    attendee_count = (room['attendee_count'] or 0) if has_event else 0
+    utilization = _room_utilization(attendee_count, room['capacity']) if has_event else 0.0
+    
+    return {
+        "roomId": room['id'],
+        "roomName": room['name'],
+        "coordinates": {
+            "x": room['x'],
+            "y": room['y'],
+            "width": room['width'],
+            "height": room['height']
+        },
+        "event": {
+            "id": room['event_id'],
+            "title": room['title'],
+            "topicTags": room['tags'] or [],
+            "status": "live",
+            "attendeeCount": attendee_count
+        } if has_event else None,
+        "liveMetrics": {
+            "attendeeCount": attendee_count,
+            "capacity": room['capacity'],
+            # Base heat of 0.2 for any event
+            "activityHeat": utilization * 0.8 + 0.2 if has_event else 0.0,
+            "utilizationRate": utilization
+        }
+    }
+
+async def _floor_pulse_payload(floor_id: int) -> bytes:
+    """Build the serialized pulse for all rooms on a floor."""
+    now = datetime.now(timezone.utc)
+    async with get_db_connection() as conn:
+        # Rooms on floor with their current event (if any) in one round trip
+        rooms = await conn.fetch("""
+            SELECT r.id, r.name, r.x, r.y, r.width, r.height, r.capacity,
+                   e.id AS event_id, e.title, e.tags,
+                   (SELECT COUNT(*) FROM event_attendees ea
+                    WHERE ea.event_id = e.id) AS attendee_count
+            FROM rooms r
+            LEFT JOIN LATERAL (
+                SELECT id, title, tags
+                FROM events
+                WHERE room_id = r.id AND start_utc <= $2 AND end_utc >= $2
+                LIMIT 1
+            ) e ON TRUE
+            WHERE r.floor = $1
+        """, floor_id, now)
+    
+    return json_dumps([_room_pulse(room) for room in rooms])
+
+@router.get("/floors/{floor_id}/pulse", responses={200: {"model": List[RoomPulse]}})
 async def get_floor_pulse(
     floor_id: int,
-    jwt_payload: dict = Depends(verify_jwt)
-) -> List[RoomPulse]:
+    jwt_payload: dict = Depends(verify_jwt),
+    r: redis.Redis = Depends(redis_dep)
+) -> Response:
     """Get real-time pulse for all rooms on a floor."""
     
-    # Check rate limit
-    if not await check_rate_limit(f"/api/floors/{floor_id}/pulse", jwt_payload.get("sub", "anonymous")):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    
-    # Check cache
+    # Check rate limit and cache in one round trip
     cache_key = f"intel:pulse:{floor_id}"
-    cached = await cache_get(cache_key)
+    allowed, cached = await begin_request(r, "floor_pulse", jwt_payload.get("sub", "anonymous"), cache_key)
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
     if cached:
-        return json.loads(cached)
+        return json_response(cached)
+    
+    # Cache miss: one request computes, concurrent ones wait for its result
+    payload = await compute_once(
+        r, cache_key, CACHE_TTLS["intel:pulse"], partial(_floor_pulse_payload, floor_id)
+    )
+    return json_response(payload)
+
+def _close_array(buf: bytearray):
+    """Terminate a JSON array whose elements were each written with a trailing comma."""
+    if buf[-1:] == b",":
+        buf[-1:] = b"]"
+    else:
+        buf += b"]"
+
+async def _community_network_payload(days: int) -> bytes:
+    """Build the serialized community network graph.
+    
+    Rows are streamed from cursors and serialized straight into the payload,
+    without materializing the result sets or intermediate node/edge lists.
+    """
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    member_ids = []
+    buf = bytearray(b'{"nodes":[')
     
     async with get_db_connection() as conn:
-        # Get rooms on floor
-        rooms = await conn.fetch("""
-            SELECT id, name, x, y, width, height, capacity
-            FROM rooms
-            WHERE floor = $1
-        """, floor_id)
-        
-        # Get current events
-        now = datetime.now(timezone.utc)
-        events = await conn.fetch("""
-            SELECT e.id, e.title, e.tags, e.room_id, 
-                   COUNT(ea.member_id) as attendee_count
-            FROM events e
-            LEFT JOIN event_attendees ea ON e.id = ea.event_id
-            WHERE e.room_id IN (SELECT id FROM rooms WHERE floor = $1)
-              AND e.start_utc <= $2 AND e.end_utc >= $2
-            GROUP BY e.id
-        """, floor_id, now)
-        
-        events_by_room = {e['room_id']: e for e in events}
-        
-        result = []
-        for room in rooms:
-            event_data = events_by_room.get(room['id'])
+        # Cursors only live inside a transaction
+        async with conn.transaction():
+            # Active members
+            async for m in conn.cursor("""
+                SELECT DISTINCT m.id, m.name, m.avatar_url, m.primary_topic, 
+                       m.floor, m.influence_score
+                FROM members m
+                JOIN event_attendees ea ON m.id = ea.member_id
+                JOIN events e ON ea.event_id = e.id
+                WHERE e.start_utc >= $1
+                LIMIT 100
+            """, cutoff_date):
+                member_ids.append(m['id'])
+                buf += json_dumps({
+                    "id": m['id'],
+                    "name": m['name'],
+                    "avatarUrl": m['avatar_url'],
+                    "primaryTopic": m['primary_topic'] or "General",
+                    "floor": m['floor'] or 1,
+                    "influenceScore": m['influence_score'] or 5.0
+                })
+                buf += b","
+            _close_array(buf)
             
-            room_pulse = {
-                "roomId": room['id'],
-                "roomName": room['name'],
-                "coordinates": {
-                    "x": room['x'],
-                    "y": room['y'],
-                    "width": room['width'],
-                    "height": room['height']
-                },
-                "event": None,
-                "liveMetrics": {
-                    "attendeeCount": 0,
-                    "capacity": room['capacity'],
-                    "activityHeat": 0.0,
-                    "utilizationRate": 0.0
-                }
-            }
-            
-            if event_data:
-                attendee_count = event_data['attendee_count'] or 0
-                utilization = min(attendee_count / room['capacity'], 1.0) if room['capacity'] > 0 else 0
-                
-                room_pulse["event"] = {
-                    "id": event_data['id'],
-                    "title": event_data['title'],
-                    "topicTags": event_data['tags'] or [],
-                    "status": "live",
-                    "attendeeCount": attendee_count
-                }
-                room_pulse["liveMetrics"] = {
-                    "attendeeCount": attendee_count,
-                    "capacity": room['capacity'],
-                    "activityHeat": utilization * 0.8 + 0.2,  # Base heat of 0.2 for any event
-                    "utilizationRate": utilization
-                }
-            
-            result.append(room_pulse)
-    
-    # Cache result
-    await cache_set(cache_key, json.dumps(result), CACHE_TTLS["intel:pulse"])
+            # Connections between them
+            buf += b',"edges":['
+            async for c in conn.cursor("""
+                SELECT member_a, member_b, strength, reason, event_count
+                FROM member_connections
+                WHERE member_a = ANY($1::text[]) AND member_b = ANY($1::text[])
+                  AND last_interaction >= $2
+                ORDER BY strength DESC
+                LIMIT 200
+            """, member_ids, cutoff_date):
+                buf += json_dumps({
+                    "source": c['member_a'],
+                    "target": c['member_b'],
+                    "strength": c['strength'],
+                    "reason": c['reason'] or f"Co-attended {c['event_count']} events",
+                    "eventCount": c['event_count']
+                })
+                buf += b","
+            _close_array(buf)
     
-    return result
+    buf += b"}"
+    return bytes(buf)
 
-@router.get("/community/network", response_model=NetworkGraph)
+@router.get("/community/network", responses={200: {"model": NetworkGraph}})
 async def get_community_network(
     days: int = Query(30, ge=1, le=365),
-    jwt_payload: dict = Depends(verify_jwt)
-) -> NetworkGraph:
+    jwt_payload: dict = Depends(verify_jwt),
+    r: redis.Redis = Depends(redis_dep)
+) -> Response:
     """Get community network graph."""
     
-    # Check cache
-    cache_key = f"intel:network:{days}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return json.loads(cached)
-    
-    async with get_db_connection() as conn:
-        # Get active members
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-        
-        members = await conn.fetch("""
-            SELECT DISTINCT m.id, m.name, m.avatar_url, m.primary_topic, 
-                   m.floor, m.influence_score
-            FROM members m
-            JOIN event_attendees ea ON m.id = ea.member_id
-            JOIN events e ON ea.event_id = e.id
-            WHERE e.start_utc >= $1
-            LIMIT 100
-        """, cutoff_date)
-        
-        # Get connections
-        member_ids = [m['id'] for m in members]
-        connections = await conn.fetch("""
-            SELECT member_a, member_b, strength, reason, event_count
-            FROM member_connections
-            WHERE member_a = ANY($1::text[]) AND member_b = ANY($1::text[])
-              AND last_interaction >= $2
-            ORDER BY strength DESC
-            LIMIT 200
-        """, member_ids, cutoff_date)
-        
-        nodes = [
-            {
-                "id": m['id'],
-                "name": m['name'],
-                "avatarUrl": m['avatar_url'],
-                "primaryTopic": m['primary_topic'] or "General",
-                "floor": m['floor'] or 1,
-                "influenceScore": float(m['influence_score'] or 5.0)
-            }
-            for m in members
-        ]
-        
-        edges = [
-            {
-                "source": c['member_a'],
-                "target": c['member_b'],
-                "strength": float(c['strength']),
-                "reason": c['reason'] or f"Co-attended {c['event_count']} events",
-                "eventCount": c['event_count']
-            }
-            for c in connections
-        ]
-        
-        result = {"nodes": nodes, "edges": edges}
-    
-    # Cache result
-    await cache_set(cache_key, json.dumps(result), CACHE_TTLS["intel:network"])
-    
-    return result
+    payload = await cached_or_compute(
+        r, f"intel:network:{days}", CACHE_TTLS["intel:network"], partial(_community_network_payload, days)
+    )
+    return json_response(payload)
 
-@router.get("/analytics/live", response_model=LiveAnalytics)
-async def get_live_analytics(jwt_payload: dict = Depends(verify_jwt)) -> LiveAnalytics:
-    """Get live dashboard analytics."""
+async def _live_analytics_payload() -> bytes:
+    """Build the serialized live dashboard analytics."""
+    now = datetime.now(timezone.utc)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_ago = now - _SEVEN_DAYS
     
-    # Check rate limit
-    if not await check_rate_limit("/api/analytics/live", jwt_payload.get("sub", "anonymous")):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    
-    # Check cache
-    cache_key = "intel:live"
-    cached = await cache_get(cache_key)
-    if cached:
-        return json.loads(cached)
-    
-    async with get_db_connection() as conn:
-        now = datetime.now(timezone.utc)
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        
+    # Independent read-only queries, each on its own pooled connection
+    (
+        active_members,
+        live_events,
+        avg_strength,
+        revenue_today,
+        trending,
+        floor_activity,
+    ) = await asyncio.gather(
         # Tower metrics
-        active_members = await conn.fetchval("""
+        _fetchval("""
             SELECT COUNT(DISTINCT member_id)
             FROM event_attendees ea
             JOIN events e ON ea.event_id = e.id
             WHERE e.start_utc >= $1
-        """, now - timedelta(hours=24))
-        
-        live_events = await conn.fetchval("""
+        """, now - _ONE_DAY),
+        _fetchval("""
             SELECT COUNT(*)
             FROM events
-            WHERE start_utc <= $1 AND end_utc >= $1
-        """, now)
-        
-        collaboration_score = await conn.fetchval("""
-            SELECT AVG(strength) * 10
+            WHERE tsrange(start_utc, end_utc, '[]') @> $1::timestamp
+        """, now),
+        _fetchval("""
+            SELECT AVG(strength)
             FROM member_connections
             WHERE last_interaction >= $1
-        """, now - timedelta(days=7)) or 5.0
-        
-        revenue_today = await conn.fetchval("""
+        """, week_ago),
+        _fetchval("""
             SELECT COALESCE(SUM(projected_revenue), 0)
             FROM revenue_metrics
             WHERE updated_at >= $1
-        """, today_start) or 0.0
-        
-        # Trending topics
-        trending = await conn.fetch("""
-            SELECT unnest(tags) as topic, COUNT(*) as event_count
-            FROM events
-            WHERE start_utc >= $1
+        """, today_start),
+        # Trending topics from the per-day rollup (migration 0004)
+        _fetch("""
+            SELECT topic, SUM(event_count)::int as event_count
+            FROM topic_counts_daily
+            WHERE day >= $1
             GROUP BY topic
+            HAVING SUM(event_count) > 0
             ORDER BY event_count DESC
             LIMIT 5
-        """, now - timedelta(days=7))
-        
-        trending_topics = [
-            {
-                "topic": t['topic'],
-                "velocity": min(t['event_count'] / 10, 0.99),  # Normalize to 0-1
-                "eventCount": t['event_count']
-            }
-            for t in trending
-        ]
-        
+        """, week_ago.date()),
         # Floor activity
-        floor_activity = await conn.fetch("""
+        _fetch("""
             SELECT f.floor, f.activity_score,
                    COUNT(e.id) as current_events
             FROM floor_insights f
             LEFT JOIN rooms r ON f.floor = r.floor
             LEFT JOIN events e ON r.id = e.room_id 
-                AND e.start_utc <= $1 AND e.end_utc >= $1
+                AND tsrange(e.start_utc, e.end_utc, '[]') @> $1::timestamp
             GROUP BY f.floor, f.activity_score
             ORDER BY f.floor
-        """, now)
-        
-        result = {
-            "tower": {
-                "activeMembers": active_members or 0,
-                "liveEvents": live_events or 0,
-                "collaborationScore": float(collaboration_score),
-                "revenueToday": float(revenue_today)
-            },
-            "trendingTopics": trending_topics,
-            "floorActivity": [
-                {
-                    "floor": f['floor'],
-                    "activityScore": float(f['activity_score'] or 0.5),
-                    "currentEvents": f['current_events'] or 0
-                }
-                for f in floor_activity
-            ]
-        }
+        """, now),
+    )
     
-    # Cache result
-    await cache_set(cache_key, json.dumps(result), CACHE_TTLS["intel:live"])
+    collaboration_score = avg_strength * 10 if avg_strength else 5.0
     
-    return result
+    result = {
+        "tower": {
+            "activeMembers": active_members or 0,
+            "liveEvents": live_events or 0,
+            "collaborationScore": collaboration_score,
+            "revenueToday": revenue_today or 0.0
+        },
+        "trendingTopics": [
+            {
+                "topic": t['topic'],
+                "velocity": min(t['event_count'] / 10, 0.99),  # Normalize to 0-1
+                "eventCount": t['event_count']
+            }
+            for t in trending
+        ],
+        "floorActivity": [
+            {
+                "floor": f['floor'],
+                "activityScore": f['activity_score'] or 0.5,
+                "currentEvents": f['current_events'] or 0
+            }
+            for f in floor_activity
+        ]
+    }
+    
+    return json_dumps(result)
 
-@router.get("/revenue/optimization", response_model=RevenueOptimization)
-async def get_revenue_optimization(jwt_payload: dict = Depends(verify_jwt)) -> RevenueOptimization:
-    """Get revenue optimization insights."""
+@router.get("/analytics/live", responses={200: {"model": LiveAnalytics}})
+async def get_live_analytics(
+    jwt_payload: dict = Depends(verify_jwt),
+    r: redis.Redis = Depends(redis_dep)
+) -> Response:
+    """Get live dashboard analytics."""
     
-    # Check cache
-    cache_key = "intel:revenue"
-    cached = await cache_get(cache_key)
+    # Check rate limit and cache in one round trip
+    cache_key = "intel:live"
+    allowed, cached = await begin_request(r, "analytics_live", jwt_payload.get("sub", "anonymous"), cache_key)
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
     if cached:
-        return json.loads(cached)
+        return json_response(cached)
     
+    # Cache miss: one request computes, concurrent ones wait for its result
+    payload = await compute_once(r, cache_key, CACHE_TTLS["intel:live"], _live_analytics_payload)
+    return json_response(payload)
+
+async def _revenue_optimization_payload() -> bytes:
+    """Build the serialized revenue optimization insights."""
     async with get_db_connection() as conn:
         # Get underutilized time slots
         opportunities = await conn.fetch("""
@@ -421,206 +689,249 @@ async def get_revenue_optimization(jwt_payload: dict = Depends(verify_jwt)) -> R
         
         # Get floor utilization
         floor_util = await conn.fetch("""
-            SELECT r.floor,
-                   AVG(ea.attendance_rate) as utilization_rate,
-                   SUM(rm.projected_revenue) / NULLIF(SUM(rm.projected_revenue) OVER (), 0) as revenue_contribution
-            FROM rooms r
-            LEFT JOIN LATERAL (
-                SELECT e.room_id, 
-                       COUNT(ea.member_id)::float / NULLIF(r.capacity, 0) as attendance_rate
+            WITH room_att AS (
+                SELECT e.room_id, COUNT(ea.member_id)::float as attendees
                 FROM events e
                 LEFT JOIN event_attendees ea ON e.id = ea.event_id
-                WHERE e.room_id = r.id
-                  AND e.start_utc >= NOW() - INTERVAL '7 days'
+                WHERE e.start_utc >= NOW() - INTERVAL '7 days'
                 GROUP BY e.room_id
-            ) ea ON true
-            LEFT JOIN revenue_metrics rm ON rm.slot LIKE '%' || r.floor || '%'
-            GROUP BY r.floor
-            ORDER BY r.floor
+            ),
+            util AS (
+                SELECT r.floor,
+                       AVG(ra.attendees / NULLIF(r.capacity, 0)) as utilization_rate
+                FROM rooms r
+                LEFT JOIN room_att ra ON ra.room_id = r.id
+                GROUP BY r.floor
+            ),
+            rev AS (
+                SELECT floor, SUM(projected_revenue) as revenue
+                FROM revenue_metrics
+                WHERE floor IS NOT NULL
+                GROUP BY floor
+            ),
+            total AS (
+                SELECT SUM(revenue) as revenue FROM rev
+            )
+            SELECT u.floor, u.utilization_rate,
+                   rev.revenue / NULLIF(total.revenue, 0) as revenue_contribution
+            FROM util u
+            LEFT JOIN rev ON rev.floor = u.floor
+            CROSS JOIN total
+            ORDER BY u.floor
         """)
         
         result = {
             "opportunities": [
                 {
                     "timeSlot": o['slot'],
-                    "currentUtilization": float(o['avg_utilization']),
-                    "recommendedPriceMultiplier": float(o['price_multiplier']),
-                    "projectedRevenue": float(o['projected_revenue'])
+                    "currentUtilization": o['avg_utilization'],
+                    "recommendedPriceMultiplier": o['price_multiplier'],
+                    "projectedRevenue": o['projected_revenue']
                 }
                 for o in opportunities
             ],
             "floorUtilization": [
                 {
                     "floor": f['floor'],
-                    "utilizationRate": float(f['utilization_rate'] or 0.5),
-                    "revenueContribution": float(f['revenue_contribution'] or 0.2)
+                    "utilizationRate": f['utilization_rate'] or 0.5,
+                    "revenueContribution": f['revenue_contribution'] or 0.2
                 }
                 for f in floor_util
             ]
         }
     
-    # Cache result
-    await cache_set(cache_key, json.dumps(result), CACHE_TTLS["intel:revenue"])
+    return json_dumps(result)
+
+@router.get("/revenue/optimization", responses={200: {"model": RevenueOptimization}})
+async def get_revenue_optimization(
+    jwt_payload: dict = Depends(verify_jwt),
+    r: redis.Redis = Depends(redis_dep)
+) -> Response:
+    """Get revenue optimization insights."""
     
-    return result
+    payload = await cached_or_compute(
+        r, "intel:revenue", CACHE_TTLS["intel:revenue"], _revenue_optimization_payload
+    )
+    return json_response(payload)
 
-@router.post("/bot/query", response_model=BotResponse)
-async def query_bot(
-    query: BotQuery,
-    jwt_payload: dict = Depends(verify_jwt)
-) -> BotResponse:
-    """Query the enhanced AI bot."""
+# Bot intent handlers
+async def _bot_pulse() -> Dict[str, Any]:
+    async with get_db_connection() as conn:
+        # Get floor pulse data
+        floor_data = await conn.fetch("""
+            SELECT floor, pulse, active_events_24h, unique_attendees_7d
+            FROM floor_insights
+            ORDER BY pulse DESC
+            LIMIT 3
+        """)
     
-    # Check rate limit per chat
-    if not await check_rate_limit("/api/bot/query", f"{jwt_payload.get('sub')}:{query.chatId}"):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    top_floor = floor_data[0] if floor_data else None
+    message = f"🔥 Floor {top_floor['floor']} pulse: {top_floor['pulse']}/10 impact with {top_floor['active_events_24h']} events in 24h"
     
-    # Generate cache key from message hash
-    msg_hash = hashlib.md5(f"{query.chatId}:{query.message}".encode()).hexdigest()
-    cache_key = f"bot:{query.chatId}:{msg_hash}"
+    return {
+        "message": message,
+        "data": {
+            "floors": [
+                {
+                    "floor": f['floor'],
+                    "pulse": f['pulse'],
+                    "events24h": f['active_events_24h'],
+                    "attendees7d": f['unique_attendees_7d']
+                }
+                for f in floor_data
+            ]
+        },
+        "suggestions": [
+            "Check specific floor activity",
+            "View trending topics",
+            "Analyze cross-floor collaboration"
+        ]
+    }
+
+async def _bot_revenue() -> Dict[str, Any]:
+    async with get_db_connection() as conn:
+        # Get revenue insights
+        opportunities = await conn.fetch("""
+            SELECT slot, avg_utilization, recommended_price
+            FROM revenue_metrics
+            WHERE avg_utilization < 0.5
+            ORDER BY (recommended_price - 100) DESC
+            LIMIT 3
+        """)
     
-    # Check cache
-    cached = await cache_get(cache_key)
-    if cached:
-        return json.loads(cached)
+    if opportunities:
+        top_opp = opportunities[0]
+        message = f"💰 Opportunity: {top_opp['slot']} at {top_opp['avg_utilization']*100:.0f}% utilization. Recommended price: ${top_opp['recommended_price']:.0f}"
+    else:
+        message = "All time slots are well optimized!"
     
-    async with get_db_connection() as conn:
-        # Analyze query intent
-        message_lower = query.message.lower()
-        
-        if "pulse" in message_lower or "activity" in message_lower:
-            # Get floor pulse data
-            floor_data = await conn.fetch("""
-                SELECT floor, pulse, active_events_24h, unique_attendees_7d
-                FROM floor_insights
-                ORDER BY pulse DESC
-                LIMIT 3
-            """)
-            
-            top_floor = floor_data[0] if floor_data else None
-            message = f"🔥 Floor {top_floor['floor']} pulse: {float(top_floor['pulse'])}/10 impact with {top_floor['active_events_24h']} events in 24h"
-            
-            data = {
-                "floors": [
-                    {
-                        "floor": f['floor'],
-                        "pulse": float(f['pulse']),
-                        "events24h": f['active_events_24h'],
-                        "attendees7d": f['unique_attendees_7d']
-                    }
-                    for f in floor_data
-                ]
-            }
-            
-            suggestions = [
-                "Check specific floor activity",
-                "View trending topics",
-                "Analyze cross-floor collaboration"
-            ]
-            
-        elif "revenue" in message_lower or "optimization" in message_lower:
-            # Get revenue insights
-            opportunities = await conn.fetch("""
-                SELECT slot, avg_utilization, recommended_price
-                FROM revenue_metrics
-                WHERE avg_utilization < 0.5
-                ORDER BY (recommended_price - 100) DESC
-                LIMIT 3
-            """)
-            
-            if opportunities:
-                top_opp = opportunities[0]
-                message = f"💰 Opportunity: {top_opp['slot']} at {float(top_opp['avg_utilization'])*100:.0f}% utilization. Recommended price: ${float(top_opp['recommended_price']):.0f}"
-            else:
-                message = "All time slots are well optimized!"
-            
-            data = {
-                "opportunities": [
-                    {
-                        "slot": o['slot'],
-                        "utilization": float(o['avg_utilization']),
-                        "price": float(o['recommended_price'])
-                    }
-                    for o in opportunities
-                ]
-            }
-            
-            suggestions = [
-                "View floor utilization rates",
-                "Check peak demand times",
-                "Analyze pricing trends"
+    return {
+        "message": message,
+        "data": {
+            "opportunities": [
+                {
+                    "slot": o['slot'],
+                    "utilization": o['avg_utilization'],
+                    "price": o['recommended_price']
+                }
+                for o in opportunities
             ]
-            
-        elif "collaboration" in message_lower or "network" in message_lower:
-            # Get collaboration insights
-            top_connections = await conn.fetch("""
-                SELECT mc.strength, m1.name as member_a_name, m2.name as member_b_name
-                FROM member_connections mc
-                JOIN members m1 ON mc.member_a = m1.id
-                JOIN members m2 ON mc.member_b = m2.id
-                WHERE mc.last_interaction >= NOW() - INTERVAL '7 days'
-                ORDER BY mc.strength DESC
-                LIMIT 3
-            """)
-            
-            cross_floor = await conn.fetchval("""
-                SELECT COUNT(*)
-                FROM member_connections mc
-                JOIN members m1 ON mc.member_a = m1.id
-                JOIN members m2 ON mc.member_b = m2.id
-                WHERE m1.floor != m2.floor
-                  AND mc.last_interaction >= NOW() - INTERVAL '7 days'
-            """) or 0
-            
-            message = f"🤝 Cross-floor collaboration: {cross_floor} connections this week"
-            
-            data = {
-                "crossFloorConnections": cross_floor,
-                "topConnections": [
-                    {
-                        "members": [c['member_a_name'], c['member_b_name']],
-                        "strength": float(c['strength'])
-                    }
-                    for c in top_connections
-                ]
-            }
-            
-            suggestions = [
-                "View network graph",
-                "Check floor synergy scores",
-                "Analyze topic clusters"
+        },
+        "suggestions": [
+            "View floor utilization rates",
+            "Check peak demand times",
+            "Analyze pricing trends"
+        ]
+    }
+
+async def _bot_collaboration() -> Dict[str, Any]:
+    # Independent collaboration queries, each on its own pooled connection
+    top_connections, cross_floor = await asyncio.gather(
+        _fetch("""
+            SELECT mc.strength, m1.name as member_a_name, m2.name as member_b_name
+            FROM member_connections mc
+            JOIN members m1 ON mc.member_a = m1.id
+            JOIN members m2 ON mc.member_b = m2.id
+            WHERE mc.last_interaction >= NOW() - INTERVAL '7 days'
+            ORDER BY mc.strength DESC
+            LIMIT 3
+        """),
+        _fetchval("""
+            SELECT COUNT(*)
+            FROM member_connections mc
+            JOIN members m1 ON mc.member_a = m1.id
+            JOIN members m2 ON mc.member_b = m2.id
+            WHERE m1.floor != m2.floor
+              AND mc.last_interaction >= NOW() - INTERVAL '7 days'
+        """),
+    )
+    cross_floor = cross_floor or 0
+    
+    return {
+        "message": f"🤝 Cross-floor collaboration: {cross_floor} connections this week",
+        "data": {
+            "crossFloorConnections": cross_floor,
+            "topConnections": [
+                {
+                    "members": [c['member_a_name'], c['member_b_name']],
+                    "strength": c['strength']
+                }
+                for c in top_connections
             ]
-            
-        else:
-            # Default response with general insights
+        },
+        "suggestions": [
+            "View network graph",
+            "Check floor synergy scores",
+            "Analyze topic clusters"
+        ]
+    }
+
+async def _bot_default(r: redis.Redis) -> Dict[str, Any]:
+    # Reuse the live event count from the dashboard's cached analytics when fresh
+    cached = await cache_get(r, "intel:live")
+    if cached:
+        live_events = orjson.loads(cached)["tower"]["liveEvents"]
+    else:
+        async with get_db_connection() as conn:
             live_events = await conn.fetchval("""
                 SELECT COUNT(*) FROM events
-                WHERE start_utc <= NOW() AND end_utc >= NOW()
+                WHERE tsrange(start_utc, end_utc, '[]') @> NOW()::timestamp
             """) or 0
-            
-            message = f"👋 Frontier Tower is buzzing with {live_events} live events! What would you like to explore?"
-            data = {"liveEvents": live_events}
-            suggestions = [
-                "Show floor pulse",
-                "Check revenue optimization",
-                "View collaboration network"
-            ]
-        
-        result = {
-            "message": message,
-            "data": data,
-            "suggestions": suggestions
-        }
     
-    # Cache result
-    await cache_set(cache_key, json.dumps(result), CACHE_TTLS["bot"])
+    return {
+        "message": f"👋 Frontier Tower is buzzing with {live_events} live events! What would you like to explore?",
+        "data": {"liveEvents": live_events},
+        "suggestions": [
+            "Show floor pulse",
+            "Check revenue optimization",
+            "View collaboration network"
+        ]
+    }
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+# (keywords, handler) in priority order; messages matching none get _bot_default
+_INTENTS: List[Tuple[frozenset, Callable[[], Awaitable[Dict[str, Any]]]]] = [
+    (frozenset({"pulse", "activity"}), _bot_pulse),
+    (frozenset({"revenue", "optimization"}), _bot_revenue),
+    (frozenset({"collaboration", "network"}), _bot_collaboration),
+]
+
+@router.post("/bot/query", responses={200: {"model": BotResponse}})
+async def query_bot(
+    query: BotQuery,
+    jwt_payload: dict = Depends(verify_jwt),
+    r: redis.Redis = Depends(redis_dep)
+) -> Response:
+    """Query the enhanced AI bot."""
+    
+    # Generate cache key from message hash
+    msg_hash = hashlib.blake2b(
+        b":".join((query.chatId.encode(), query.message.encode())), digest_size=16
+    ).hexdigest()
+    cache_key = f"bot:{query.chatId}:{msg_hash}"
+    
+    # Check rate limit per chat and cache in one round trip
+    allowed, cached = await begin_request(r, "bot_query", f"{jwt_payload.get('sub')}:{query.chatId}", cache_key)
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    if cached:
+        return json_response(cached)
+    
+    # Analyze query intent: first intent sharing a keyword with the message wins
+    words = set(_WORD_RE.findall(query.message.lower()))
+    handler = next((fn for keywords, fn in _INTENTS if keywords & words), None)
+    result = await handler() if handler else await _bot_default(r)
     
-    # Publish to WebSocket for real-time updates
-    r = await get_redis()
-    await r.publish("tower-ai-feed", json.dumps({
-        "type": "bot_response",
-        "chatId": query.chatId,
-        "response": result
-    }))
+    # Cache result and publish to WebSocket for real-time updates in one round trip
+    payload = json_dumps(result)
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.setex(cache_key, CACHE_TTLS["bot"], payload)
+        pipe.publish("tower-ai-feed", json_dumps({
+            "type": "bot_response",
+            "chatId": query.chatId,
+            "response": result
+        }))
+        await pipe.execute()
     
-    return result
\ No newline at end of file
+    return json_response(payload)
\ No newline at end of file
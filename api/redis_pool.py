@@ -0,0 +1,56 @@
+"""Shared Redis connection pool for Frontier Tower Intelligence API."""
+
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+from fastapi import Request
+
+from api.config import (
+    REDIS_DECODE_RESPONSES,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_TIMEOUT,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Shared client backed by a single connection pool
+_client: Optional[redis.Redis] = None
+
+async def init_redis_pool() -> redis.Redis:
+    """Initialize the shared Redis client and its connection pool."""
+    global _client
+
+    if _client is None:
+        pool = redis.ConnectionPool.from_url(
+            REDIS_URL,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_timeout=REDIS_TIMEOUT,
+            socket_connect_timeout=REDIS_TIMEOUT,
+            # Long-lived pooled (and pubsub) connections: detect dead peers via TCP keepalive
+            socket_keepalive=True,
+            decode_responses=REDIS_DECODE_RESPONSES,
+        )
+        _client = redis.Redis(connection_pool=pool)
+        logger.info("Redis connection pool created")
+    return _client
+
+async def close_redis_pool():
+    """Close the shared Redis client and disconnect pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        await _client.connection_pool.disconnect()
+        _client = None
+        logger.info("Redis connection pool closed")
+
+def get_redis_client() -> redis.Redis:
+    """Get the shared Redis client created at startup."""
+    if _client is None:
+        raise RuntimeError("Redis pool not initialized; call init_redis_pool() at startup")
+    return _client
+
+async def redis_dep(request: Request) -> redis.Redis:
+    """FastAPI dependency returning the Redis client created in the app lifespan."""
+    return request.app.state.redis
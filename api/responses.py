@@ -0,0 +1,31 @@
+"""JSON serialization for Frontier Tower Intelligence API responses."""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+# Naive datetimes are UTC throughout the API; render them with a "Z" suffix
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    # NUMERIC columns come back from asyncpg as Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def json_dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes."""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+def utc_now_iso() -> str:
+    """Current UTC time in the same ISO 8601 "Z" form json_dumps gives datetimes."""
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
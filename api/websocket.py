@@ -1,67 +1,154 @@
 """WebSocket server for real-time tower updates."""
 
-import json
+import asyncio
 import logging
+import time
+import uuid
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Dict, Optional, Set
+from typing import Dict, List, Set, Tuple, Union
 
+import orjson
 import redis.asyncio as redis
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from jwt import decode, InvalidTokenError
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from api.config import JWT_SECRET
+from api.auth import cached_claims, decode_token
+from api.config import WS_SEND_BATCH_SIZE, WS_SEND_QUEUE_SIZE
+from api.redis_pool import get_redis_client
+from api.responses import json_dumps
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["websocket"])
 
-# Active connections
-connections: Dict[str, Set[WebSocket]] = {
-    "tower-ai-feed": set(),
-    "floor-pulse-2": set(),
-    "floor-pulse-4": set(),
-    "floor-pulse-9": set(),
-    "floor-pulse-15": set(),
-    "floor-pulse-16": set(),
+# Static replies, serialized once at import
+FLOORS = (2, 4, 9, 15, 16)
+_VALID_FLOORS = frozenset(FLOORS)
+
+_PONG = json_dumps({"type": "pong"}).decode()
+
+_SUBSCRIBED = {
+    f"floor-pulse-{floor}": json_dumps({"type": "subscribed", "channel": f"floor-pulse-{floor}"}).decode()
+    for floor in FLOORS
+}
+
+def _welcome_prefix(**fields) -> str:
+    """Welcome message JSON up to the per-connection "user" value."""
+    return json_dumps({"type": "connected", **fields}).decode()[:-1] + ',"user":'
+
+_TOWER_WELCOME = _welcome_prefix(
+    channel="tower-ai-feed", message="Connected to Frontier Tower AI Feed"
+)
+_FLOOR_WELCOMES = {
+    floor: _welcome_prefix(
+        channel=f"floor-pulse-{floor}", floor=floor, message=f"Connected to Floor {floor} Pulse Feed"
+    )
+    for floor in FLOORS
 }
 
+def _welcome(prefix: str, user_id: str) -> str:
+    return prefix + json_dumps(user_id).decode() + "}"
+
 # Redis pubsub client
-redis_client: Optional[redis.Redis] = None
+async def get_redis() -> redis.Redis:
+    return get_redis_client()
+
+# Outgoing publishes, coalesced into pipelined batches by publish_worker
+PUBLISH_QUEUE_SIZE = 10_000
+PUBLISH_BATCH_SIZE = 256
+PUBLISH_LINGER = 0.002  # seconds to wait for more messages before flushing a batch
 
-async def get_redis():
-    global redis_client
-    if not redis_client:
-        redis_client = await redis.from_url("redis://localhost:6379", decode_responses=True)
-    return redis_client
+_publish_queue: "asyncio.Queue[Tuple[str, bytes]]" = asyncio.Queue(maxsize=PUBLISH_QUEUE_SIZE)
+_dropped_publishes = 0  # publishes discarded because the queue was full
+
+# Messages published here are broadcast locally at once and tagged with this node's
+# ID first, so the listener can drop their Redis echo with a prefix check
+NODE_ID = uuid.uuid4().hex[:12]
+_LOCAL_PREFIX = b'{"node":"' + NODE_ID.encode() + b'"'
+
+# Incoming pubsub messages are read in bursts and broadcast per channel as one frame
+LISTENER_BATCH_SIZE = 64
+LISTENER_POLL_TIMEOUT = 0.002  # seconds to wait for the next message in a burst
+# Idle waits stay below the pool's socket timeout, which would otherwise end a quiet read
+LISTENER_IDLE_TIMEOUT = 1.0
+LISTENER_RETRY_MAX = 30.0  # seconds; cap for the resubscribe backoff
 
 async def verify_ws_token(token: str) -> dict:
-    """Verify JWT token for WebSocket connection."""
-    try:
-        payload = decode(token, JWT_SECRET, algorithms=["HS256"])
-        if payload.get("aud") != "frontier-dashboard":
-            raise InvalidTokenError("Invalid audience")
+    """Verify JWT token for WebSocket connection.
+    
+    Shares the HTTP auth cache, so reconnects with the same token skip
+    signature verification; a cache miss is verified in a worker thread so
+    the event loop keeps serving other sockets.
+    """
+    payload = cached_claims(token)
+    if payload is not None:
         return payload
-    except InvalidTokenError as e:
-        logger.error(f"WebSocket auth failed: {e}")
-        raise HTTPException(status_code=401, detail="Invalid token")
+    return await asyncio.get_running_loop().run_in_executor(None, decode_token, token)
+
+class ChannelConnections:
+    """Connections subscribed to one channel.
+    
+    A list keeps broadcast iteration fast; the index makes removal an O(1)
+    swap-pop instead of a list scan.
+    """
+    
+    def __init__(self):
+        self.sockets: List[WebSocket] = []
+        self._index: Dict[WebSocket, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.sockets)
+    
+    def add(self, websocket: WebSocket):
+        if websocket not in self._index:
+            self._index[websocket] = len(self.sockets)
+            self.sockets.append(websocket)
+    
+    def discard(self, websocket: WebSocket):
+        i = self._index.pop(websocket, None)
+        if i is None:
+            return
+        last = self.sockets.pop()
+        if last is not websocket:
+            self.sockets[i] = last
+            self._index[last] = i
+
+def _join_frames(frames: List[str]) -> str:
+    """Coalesce queued messages into one frame, flattening already-batched arrays."""
+    if len(frames) == 1:
+        return frames[0]
+    return "[" + ",".join(f[1:-1] if f.startswith("[") else f for f in frames) + "]"
 
 class ConnectionManager:
-    """Manages WebSocket connections and broadcasts."""
+    """Manages WebSocket connections and broadcasts.
+    
+    Each connection gets a bounded send queue drained by its own writer task,
+    so a slow client never holds up a broadcast; one that falls too far behind
+    is closed.
+    """
     
     def __init__(self):
-        self.active_connections: Dict[str, Set[WebSocket]] = {
-            "tower-ai-feed": set(),
-            "floor-pulse-2": set(),
-            "floor-pulse-4": set(),
-            "floor-pulse-9": set(),
-            "floor-pulse-15": set(),
-            "floor-pulse-16": set(),
+        self.active_connections: Dict[str, ChannelConnections] = {
+            "tower-ai-feed": ChannelConnections(),
+            "floor-pulse-2": ChannelConnections(),
+            "floor-pulse-4": ChannelConnections(),
+            "floor-pulse-9": ChannelConnections(),
+            "floor-pulse-15": ChannelConnections(),
+            "floor-pulse-16": ChannelConnections(),
         }
         self.user_channels: Dict[WebSocket, Set[str]] = {}
+        self.queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.writers: Dict[WebSocket, asyncio.Task] = {}
+        self._closing: Set[asyncio.Task] = set()
     
     async def connect(self, websocket: WebSocket, channel: str):
-        """Add connection to channel."""
-        await websocket.accept()
+        """Add connection to channel, accepting it on first use."""
+        if websocket not in self.queues:
+            await websocket.accept()
+            queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+            self.queues[websocket] = queue
+            self.writers[websocket] = asyncio.create_task(self._writer(websocket, queue))
+        
         if channel in self.active_connections:
             self.active_connections[channel].add(websocket)
             if websocket not in self.user_channels:
@@ -70,7 +157,12 @@ class ConnectionManager:
             logger.info(f"WebSocket connected to channel: {channel}")
     
     def disconnect(self, websocket: WebSocket):
-        """Remove connection from all channels."""
+        """Remove connection from all channels and stop its writer."""
+        self.queues.pop(websocket, None)
+        writer = self.writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+        
         if websocket in self.user_channels:
             for channel in self.user_channels[websocket]:
                 if channel in self.active_connections:
@@ -78,27 +170,73 @@ class ConnectionManager:
             del self.user_channels[websocket]
             logger.info("WebSocket disconnected")
     
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Send message to specific connection."""
+    async def close(self):
+        """Cancel every writer and pending slow-client close (called at shutdown)."""
+        tasks = [*self.writers.values(), *self._closing]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.writers.clear()
+        self.queues.clear()
+    
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Send queued messages in order, coalescing whatever has piled up."""
         try:
-            await websocket.send_text(message)
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < WS_SEND_BATCH_SIZE:
+                    try:
+                        batch.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                await websocket.send_text(_join_frames(batch))
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
+            logger.error(f"Error sending to connection: {e}")
+            self.disconnect(websocket)
     
-    async def broadcast(self, channel: str, message: str):
-        """Broadcast message to all connections in channel."""
-        if channel in self.active_connections:
-            disconnected = set()
-            for connection in self.active_connections[channel]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to connection: {e}")
-                    disconnected.add(connection)
-            
-            # Clean up disconnected connections
-            for conn in disconnected:
-                self.disconnect(conn)
+    def _enqueue(self, websocket: WebSocket, message: str) -> bool:
+        """Queue a message for a connection; False if it has fallen too far behind."""
+        queue = self.queues.get(websocket)
+        if queue is None:
+            return True
+        try:
+            queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    def _drop_slow(self, websocket: WebSocket):
+        logger.warning("Closing WebSocket that cannot keep up with its feed")
+        self.disconnect(websocket)
+        task = asyncio.create_task(websocket.close(code=1013, reason="Too slow"))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def send_personal_message(self, message: Union[str, bytes], websocket: WebSocket):
+        """Send message to specific connection."""
+        if isinstance(message, bytes):
+            message = message.decode()
+        if not self._enqueue(websocket, message):
+            self._drop_slow(websocket)
+    
+    async def broadcast(self, channel: str, message: Union[str, bytes]):
+        """Broadcast message to all connections in channel.
+        
+        Raw bytes from Redis are decoded once per broadcast, and only if the
+        channel has listeners. Frames stay text since clients JSON.parse them.
+        """
+        if self.active_connections.get(channel):
+            if isinstance(message, bytes):
+                message = message.decode()
+            slow = [
+                websocket
+                for websocket in self.active_connections[channel].sockets
+                if not self._enqueue(websocket, message)
+            ]
+            for websocket in slow:
+                self._drop_slow(websocket)
 
 manager = ConnectionManager()
 
@@ -122,38 +260,25 @@ async def websocket_tower_feed(websocket: WebSocket, token: str = None):
     await manager.connect(websocket, "tower-ai-feed")
     
     # Send welcome message
-    await manager.send_personal_message(
-        json.dumps({
-            "type": "connected",
-            "channel": "tower-ai-feed",
-            "user": user_id,
-            "message": "Connected to Frontier Tower AI Feed"
-        }),
-        websocket
-    )
+    await manager.send_personal_message(_welcome(_TOWER_WELCOME, user_id), websocket)
     
     try:
         # Keep connection alive and handle incoming messages
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             # Handle different message types
             if message.get("type") == "ping":
-                await manager.send_personal_message(
-                    json.dumps({"type": "pong"}),
-                    websocket
-                )
+                await manager.send_personal_message(_PONG, websocket)
             elif message.get("type") == "subscribe":
                 # Subscribe to additional channels
                 channel = message.get("channel")
                 if channel and channel.startswith("floor-pulse-"):
                     await manager.connect(websocket, channel)
                     await manager.send_personal_message(
-                        json.dumps({
-                            "type": "subscribed",
-                            "channel": channel
-                        }),
+                        _SUBSCRIBED.get(channel)
+                        or json_dumps({"type": "subscribed", "channel": channel}),
                         websocket
                     )
             
@@ -167,6 +292,11 @@ async def websocket_tower_feed(websocket: WebSocket, token: str = None):
 async def websocket_floor_pulse(websocket: WebSocket, floor_id: int, token: str = None):
     """WebSocket endpoint for floor-specific pulse updates."""
     
+    # Validate floor first: cheapest check, sheds bogus connects before JWT work
+    if floor_id not in _VALID_FLOORS:
+        await websocket.close(code=1003, reason="Invalid floor")
+        return
+    
     # Verify JWT
     if not token:
         await websocket.close(code=1008, reason="Missing token")
@@ -179,39 +309,22 @@ async def websocket_floor_pulse(websocket: WebSocket, floor_id: int, token: str
         await websocket.close(code=1008, reason="Invalid token")
         return
     
-    # Validate floor
-    if floor_id not in [2, 4, 9, 15, 16]:
-        await websocket.close(code=1003, reason="Invalid floor")
-        return
-    
     channel = f"floor-pulse-{floor_id}"
     
     # Connect to floor-specific channel
     await manager.connect(websocket, channel)
     
     # Send welcome message
-    await manager.send_personal_message(
-        json.dumps({
-            "type": "connected",
-            "channel": channel,
-            "floor": floor_id,
-            "user": user_id,
-            "message": f"Connected to Floor {floor_id} Pulse Feed"
-        }),
-        websocket
-    )
+    await manager.send_personal_message(_welcome(_FLOOR_WELCOMES[floor_id], user_id), websocket)
     
     try:
         # Keep connection alive
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             if message.get("type") == "ping":
-                await manager.send_personal_message(
-                    json.dumps({"type": "pong"}),
-                    websocket
-                )
+                await manager.send_personal_message(_PONG, websocket)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -220,67 +333,162 @@ async def websocket_floor_pulse(websocket: WebSocket, floor_id: int, token: str
         manager.disconnect(websocket)
 
 async def redis_listener():
-    """Listen to Redis pubsub and broadcast to WebSocket clients."""
-    r = await get_redis()
-    pubsub = r.pubsub()
-    
-    # Subscribe to channels
-    await pubsub.subscribe(
-        "tower-ai-feed",
-        "floor-pulse-2",
-        "floor-pulse-4",
-        "floor-pulse-9",
-        "floor-pulse-15",
-        "floor-pulse-16"
-    )
+    """Listen to Redis pubsub and broadcast to WebSocket clients.
     
-    logger.info("Redis listener started")
+    A dropped connection is logged and resubscribed with exponential backoff,
+    so one Redis hiccup does not silence the feeds until restart.
+    """
+    r = await get_redis()
+    delay = 1.0
     
-    async for message in pubsub.listen():
-        if message["type"] == "message":
-            channel = message["channel"]
-            data = message["data"]
-            
-            # Broadcast to WebSocket clients
-            await manager.broadcast(channel, data)
+    while True:
+        pubsub = r.pubsub()
+        try:
+            # Subscribe to the tower feed and every floor feed as patterns; messages
+            # still carry their concrete channel name
+            await pubsub.psubscribe("tower-ai-feed", "floor-pulse-*")
+            logger.info("Redis listener started")
+            delay = 1.0
             
-            logger.debug(f"Broadcasted to {channel}: {data[:100]}...")
+            while True:
+                batches = await _read_burst(pubsub)
+                if batches:
+                    await asyncio.gather(*(
+                        manager.broadcast(channel, _frame(messages))
+                        for channel, messages in batches.items()
+                    ))
+        except redis.RedisError as e:
+            logger.error(f"Redis listener disconnected: {e}; resubscribing in {delay:.0f}s")
+        finally:
+            await pubsub.aclose()
+        
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, LISTENER_RETRY_MAX)
+
+async def _read_burst(pubsub) -> Dict[str, list]:
+    """Wait for one pubsub message, then collect whatever follows within the poll timeout.
+
+    Messages for channels with no local subscribers are dropped here, before
+    they are batched or framed. Every message read counts towards the burst
+    size, dropped ones included, so a busy feed can't keep the burst open.
+    """
+    batches = defaultdict(list)
+    timeout = LISTENER_IDLE_TIMEOUT
+    
+    for _ in range(LISTENER_BATCH_SIZE):
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            break
+        timeout = LISTENER_POLL_TIMEOUT
+        if message["type"] == "pmessage" and not message["data"].startswith(_LOCAL_PREFIX):
+            channel = message["channel"].decode()
+            if manager.active_connections.get(channel):
+                batches[channel].append(message["data"])
+    return batches
+
+def _frame(messages: list) -> bytes:
+    """Send a lone message as-is and a burst as one JSON array."""
+    if len(messages) == 1:
+        return messages[0]
+    return b"[" + b",".join(messages) + b"]"
+
+async def _next_batch() -> list:
+    """Wait for one queued publish, then collect more until the batch fills or lingers out."""
+    batch = [await _publish_queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PUBLISH_LINGER
+    
+    while len(batch) < PUBLISH_BATCH_SIZE:
+        try:
+            batch.append(_publish_queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(_publish_queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def publish_worker():
+    """Drain queued publishes to Redis, one pipelined round trip per batch."""
+    r = await get_redis()
+    logger.info("Redis publish worker started")
+    
+    while True:
+        batch = await _next_batch()
+        try:
+            async with r.pipeline(transaction=False) as pipe:
+                for channel, message in batch:
+                    pipe.publish(channel, message)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Failed to publish {len(batch)} messages: {e}")
+
+# Publish timestamps, formatted at most once per millisecond
+_stamp_ms = -1
+_stamp = ""
+
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601 with millisecond precision."""
+    global _stamp_ms, _stamp
+    now_ms = time.time_ns() // 1_000_000
+    if now_ms != _stamp_ms:
+        _stamp_ms = now_ms
+        _stamp = datetime.fromtimestamp(now_ms / 1000, timezone.utc).isoformat(
+            timespec="milliseconds"
+        ).replace("+00:00", "Z")
+    return _stamp
 
 # Publish helper functions
+async def _publish(channel: str, message: dict):
+    """Deliver to this process's sockets directly and to other nodes through Redis."""
+    global _dropped_publishes
+    payload = json_dumps({"node": NODE_ID, **message})
+    try:
+        _publish_queue.put_nowait((channel, payload))
+    except asyncio.QueueFull:
+        # publish_worker is stalled or gone: drop the Redis copy rather than
+        # block the caller; local sockets still get the message below
+        _dropped_publishes += 1
+        if _dropped_publishes % 1000 == 1:
+            logger.warning(f"Publish queue full; {_dropped_publishes} messages dropped so far")
+    await manager.broadcast(channel, payload)
+
 async def publish_bot_response(chat_id: str, response: dict):
     """Publish bot response to tower-ai-feed."""
-    r = await get_redis()
-    await r.publish("tower-ai-feed", json.dumps({
+    await _publish("tower-ai-feed", {
         "type": "bot_response",
         "chatId": chat_id,
         "response": response,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }))
+        "timestamp": _now_iso()
+    })
 
 async def publish_floor_pulse(floor_id: int, pulse_data: dict):
     """Publish floor pulse update."""
-    r = await get_redis()
-    await r.publish(f"floor-pulse-{floor_id}", json.dumps({
+    await _publish(f"floor-pulse-{floor_id}", {
         "type": "floor_pulse",
         "floor": floor_id,
         "data": pulse_data,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }))
+        "timestamp": _now_iso()
+    })
 
 async def publish_live_metrics(metrics: dict):
     """Publish live metrics to tower feed."""
-    r = await get_redis()
-    await r.publish("tower-ai-feed", json.dumps({
+    await _publish("tower-ai-feed", {
         "type": "live_metrics",
         "metrics": metrics,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }))
+        "timestamp": _now_iso()
+    })
 
 async def publish_revenue_alert(opportunity: dict):
     """Publish revenue optimization alert."""
-    r = await get_redis()
-    await r.publish("tower-ai-feed", json.dumps({
+    await _publish("tower-ai-feed", {
         "type": "revenue_alert",
         "opportunity": opportunity,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }))
\ No newline at end of file
+        "timestamp": _now_iso()
+    })
@@ -0,0 +1,57 @@
+-- Migration 0004: Trending topic rollup
+-- Idempotent migration; keeps per-day tag counts in step with events so the
+-- trending query reads a handful of rollup rows instead of unnesting every event
+
+CREATE TABLE IF NOT EXISTS topic_counts_daily (
+    topic TEXT NOT NULL,
+    day DATE NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (topic, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_topic_counts_day ON topic_counts_daily(day);
+
+-- Apply an event's tags to its start day with the given sign (+1 add, -1 remove)
+CREATE OR REPLACE FUNCTION apply_topic_counts(event_tags TEXT[], event_start TIMESTAMP, delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF event_tags IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO topic_counts_daily (topic, day, event_count)
+    SELECT tag, event_start::date, COUNT(*) * delta
+    FROM unnest(event_tags) AS tag
+    GROUP BY tag
+    ON CONFLICT (topic, day) DO UPDATE
+        SET event_count = topic_counts_daily.event_count + EXCLUDED.event_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION events_topic_counts_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_topic_counts(OLD.tags, OLD.start_utc, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_topic_counts(NEW.tags, NEW.start_utc, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS events_topic_counts ON events;
+CREATE TRIGGER events_topic_counts
+    AFTER INSERT OR DELETE OR UPDATE OF tags, start_utc ON events
+    FOR EACH ROW EXECUTE FUNCTION events_topic_counts_trigger();
+
+-- Rebuild the rollup from existing events (safe to re-run)
+TRUNCATE topic_counts_daily;
+INSERT INTO topic_counts_daily (topic, day, event_count)
+SELECT tag, start_utc::date, COUNT(*)
+FROM events, unnest(tags) AS tag
+GROUP BY tag, start_utc::date;
+
+-- Days past the trending window only need to be kept for backfills; prune with:
+-- DELETE FROM topic_counts_daily WHERE day < CURRENT_DATE - 30;
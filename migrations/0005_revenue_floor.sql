@@ -0,0 +1,10 @@
+-- Migration 0005: Floor attribution for revenue metrics
+-- Idempotent migration; replaces matching slot names against floor numbers
+-- with an explicit floor column the revenue optimization query can join on
+
+ALTER TABLE revenue_metrics ADD COLUMN IF NOT EXISTS floor INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_revenue_metrics_floor ON revenue_metrics(floor);
+
+-- Existing slots are tower-wide and stay NULL until assigned a floor, e.g.:
+-- UPDATE revenue_metrics SET floor = 2 WHERE slot = 'Friday 18:00-21:00';
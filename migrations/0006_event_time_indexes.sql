@@ -0,0 +1,21 @@
+-- Migration 0006: Indexes for time-range event queries
+-- Idempotent migration
+
+-- Live-event lookups test tsrange(start_utc, end_utc, '[]') @> <timestamp>;
+-- ranges need start <= end, so enforce it before building the index
+DO $$
+BEGIN
+    ALTER TABLE events ADD CONSTRAINT events_time_order CHECK (end_utc >= start_utc);
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_events_live
+    ON events USING GIST (tsrange(start_utc, end_utc, '[]'));
+
+-- Current event per room (floor pulse)
+CREATE INDEX IF NOT EXISTS idx_events_room_start ON events(room_id, start_utc);
+
+-- Recent collaboration strength (live analytics, bot)
+CREATE INDEX IF NOT EXISTS idx_connections_last_interaction
+    ON member_connections(last_interaction) INCLUDE (strength);
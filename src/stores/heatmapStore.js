@@ -54,10 +54,14 @@ const useHeatmapStore = create((set, get) => ({
       
       websocket.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data)
-          if (data.type === 'room_activity') {
-            get().updateRoomActivity(data.roomId, data.activityLevel)
-          }
+          // Bursts of broadcasts arrive batched as a JSON array
+          const parsed = JSON.parse(event.data)
+          const messages = Array.isArray(parsed) ? parsed : [parsed]
+          messages.forEach((data) => {
+            if (data.type === 'room_activity') {
+              get().updateRoomActivity(data.roomId, data.activityLevel)
+            }
+          })
         } catch (error) {
           console.error('Error parsing WebSocket message:', error)
         }
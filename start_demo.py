@@ -2,6 +2,7 @@
 """Simple demo server startup without Redis dependencies."""
 
 import logging
+import time
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +11,7 @@ from datetime import datetime
 
 # Import only the demo router
 from api.demo_routes import router as demo_router
+from api.responses import ORJSONResponse
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +25,7 @@ app = FastAPI(
     title="Frontier Tower Live Heatmap Demo",
     description="Real-time floor heatmap demonstration",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration
@@ -42,15 +45,16 @@ app.add_middleware(
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all requests."""
-    start_time = datetime.utcnow()
+    start_time = time.perf_counter()
     
     response = await call_next(request)
     
-    process_time = (datetime.utcnow() - start_time).total_seconds() * 1000
     logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Duration: {process_time:.2f}ms"
+        "%s %s - Status: %d - Duration: %.2fms",
+        request.method,
+        request.url.path,
+        response.status_code,
+        (time.perf_counter() - start_time) * 1000,
     )
     
     return response
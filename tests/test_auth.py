@@ -0,0 +1,108 @@
+"""Tests for the verified-token cache in Frontier Tower authentication."""
+
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from api import auth
+from api.auth import (
+    VerifiedTokenCache,
+    cached_claims,
+    create_access_token,
+    decode_token,
+    invalidate_token,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth, "time", clock)
+    return clock
+
+def test_entry_never_outlives_token_exp(clock):
+    """Test that claims stop being served at exp even when the TTL is longer."""
+
+    cache = VerifiedTokenCache(ttl=3600)
+    payload = {"sub": "test_user", "exp": clock.now + 10}
+    cache.put("token", payload)
+
+    clock.now += 9
+    assert cache.get("token") == payload
+    clock.now += 1
+    assert cache.get("token") is None
+
+def test_entry_expires_after_ttl(clock):
+    """Test that claims are dropped after the TTL even when exp is later."""
+
+    cache = VerifiedTokenCache(ttl=60)
+    payload = {"sub": "test_user", "exp": clock.now + 3600}
+    cache.put("token", payload)
+
+    clock.now += 59
+    assert cache.get("token") == payload
+    clock.now += 1
+    assert cache.get("token") is None
+
+def test_already_expired_token_is_not_cached(clock):
+    cache = VerifiedTokenCache(ttl=60)
+    cache.put("token", {"sub": "test_user", "exp": clock.now - 1})
+
+    assert cache.get("token") is None
+
+def test_eviction_keeps_size_bounded(clock):
+    """Test that inserting past max_size never grows the cache beyond it."""
+
+    cache = VerifiedTokenCache(ttl=60, max_size=3)
+    for i in range(10):
+        cache.put(f"token-{i}", {"sub": f"user-{i}"})
+        assert len(cache._entries) <= 3
+
+    # The most recent insertion is always kept
+    assert cache.get("token-9") == {"sub": "user-9"}
+
+def test_invalidate_token_forces_reverification(monkeypatch):
+    """Test that an invalidated token is verified again on its next use."""
+
+    token = create_access_token("test_user")
+    decode_token(token)
+    assert cached_claims(token) is not None
+
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+
+    decode_token(token)
+    assert calls == []
+
+    invalidate_token(token)
+    assert cached_claims(token) is None
+    assert decode_token(token)["sub"] == "test_user"
+    assert calls == [token]
+
+def test_tampered_token_is_rejected():
+    """Test that a token differing from a cached one is verified and rejected."""
+
+    token = create_access_token("test_user")
+    decode_token(token)
+
+    header, claims, signature = token.split(".")
+    tampered = ".".join([header, claims, signature[::-1]])
+    assert cached_claims(tampered) is None
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_token(tampered)
+    assert exc_info.value.status_code == 401
@@ -1,10 +1,13 @@
 """Tests for Frontier Tower Event Intelligence API."""
 
+import asyncio
 import json
 from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import orjson
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
@@ -17,8 +20,41 @@ from api.intelligence import (
     query_bot
 )
 
+async def async_rows(rows):
+    """Yield rows like an asyncpg cursor."""
+    for row in rows:
+        yield row
+
+def response_json(response):
+    """Decode the JSON body of an endpoint's Response."""
+    return json.loads(response.body)
+
+class FakePipeline:
+    """Queues commands and replays them against the mocked client on execute()."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+    
+    async def execute(self, raise_on_error=True):
+        commands, self.commands = self.commands, []
+        return [await getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in commands]
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
 # Test fixtures
-@pytest.fixture
+# The mocks are built once per module; _fresh_mocks restores their defaults before each test
+@pytest.fixture(scope="module")
 def mock_jwt_payload():
     return {
         "sub": "test_user",
@@ -26,27 +62,48 @@ def mock_jwt_payload():
         "exp": int((datetime.now(timezone.utc) + timedelta(hours=1)).timestamp())
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_redis():
-    redis_mock = AsyncMock()
-    redis_mock.get = AsyncMock(return_value=None)
-    redis_mock.setex = AsyncMock(return_value=True)
-    redis_mock.incr = AsyncMock(return_value=1)
-    redis_mock.expire = AsyncMock(return_value=True)
-    redis_mock.publish = AsyncMock(return_value=1)
-    return redis_mock
+    return AsyncMock()
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_db_connection():
-    conn_mock = AsyncMock()
-    return conn_mock
+    return AsyncMock()
+
+@pytest.fixture(scope="module", autouse=True)
+def _patched_intelligence(mock_jwt_payload, mock_db_connection):
+    with patch.multiple(
+        'api.intelligence',
+        get_db_connection=MagicMock(return_value=mock_db_connection),
+        verify_jwt=MagicMock(return_value=mock_jwt_payload),
+    ):
+        yield
+
+@pytest.fixture(autouse=True)
+def _fresh_mocks(mock_redis, mock_db_connection):
+    mock_redis.reset_mock(return_value=True, side_effect=True)
+    mock_redis.get = AsyncMock(return_value=None)
+    mock_redis.setex = AsyncMock(return_value=True)
+    mock_redis.evalsha = AsyncMock(return_value=1)  # rate-limit counter
+    mock_redis.publish = AsyncMock(return_value=1)
+    mock_redis.set = AsyncMock(return_value=True)  # cache-fill lock
+    mock_redis.delete = AsyncMock(return_value=1)
+    mock_redis.pipeline = MagicMock(side_effect=lambda **kwargs: FakePipeline(mock_redis))
+    
+    mock_db_connection.reset_mock(return_value=True, side_effect=True)
+    for name in ("fetch", "fetchval", "fetchrow"):
+        setattr(mock_db_connection, name, AsyncMock())
+    # `async with get_db_connection() as conn` must yield this same mock
+    mock_db_connection.__aenter__.return_value = mock_db_connection
+    mock_db_connection.transaction = MagicMock(return_value=AsyncMock())
+    mock_db_connection.cursor = MagicMock()
 
 # Test floor pulse endpoint
 @pytest.mark.asyncio
 async def test_get_floor_pulse(mock_jwt_payload, mock_redis, mock_db_connection):
     """Test /api/floors/{floor_id}/pulse endpoint."""
     
-    # Mock room data
+    # Mock room data joined with its current event
     mock_rooms = [
         {
             'id': 'f16r1',
@@ -55,36 +112,72 @@ async def test_get_floor_pulse(mock_jwt_payload, mock_redis, mock_db_connection)
             'y': 42,
             'width': 25,
             'height': 30,
-            'capacity': 60
-        }
-    ]
-    
-    # Mock event data
-    mock_events = [
-        {
-            'id': 'evt_123',
+            'capacity': 60,
+            'event_id': 'evt_123',
             'title': 'AI Safety Workshop',
             'tags': ['AI Safety'],
-            'room_id': 'f16r1',
             'attendee_count': 45
+        },
+        {
+            'id': 'f16r2',
+            'name': 'Library',
+            'x': 10,
+            'y': 12,
+            'width': 20,
+            'height': 15,
+            'capacity': 20,
+            'event_id': None,
+            'title': None,
+            'tags': None,
+            'attendee_count': None
         }
     ]
     
-    mock_db_connection.fetch = AsyncMock(side_effect=[mock_rooms, mock_events])
+    mock_db_connection.fetch = AsyncMock(return_value=mock_rooms)
+    
+    result = response_json(await get_floor_pulse(16, mock_jwt_payload, mock_redis))
+    
+    assert result[0] == {
+        "roomId": "f16r1",
+        "roomName": "Lounge",
+        "coordinates": {"x": 45, "y": 42, "width": 25, "height": 30},
+        "event": {
+            "id": "evt_123",
+            "title": "AI Safety Workshop",
+            "topicTags": ["AI Safety"],
+            "status": "live",
+            "attendeeCount": 45
+        },
+        "liveMetrics": {
+            "attendeeCount": 45,
+            "capacity": 60,
+            "activityHeat": 0.8,
+            "utilizationRate": 0.75
+        }
+    }
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                result = await get_floor_pulse(16, mock_jwt_payload)
+    # A room without a current event is empty, not fully used
+    assert result[1]["event"] is None
+    assert result[1]["liveMetrics"] == {
+        "attendeeCount": 0,
+        "capacity": 20,
+        "activityHeat": 0.0,
+        "utilizationRate": 0.0
+    }
     
-    assert len(result) == 1
-    room_pulse = result[0]
-    assert room_pulse["roomId"] == "f16r1"
-    assert room_pulse["roomName"] == "Lounge"
-    assert room_pulse["coordinates"]["x"] == 45
-    assert room_pulse["event"]["id"] == "evt_123"
-    assert room_pulse["event"]["attendeeCount"] == 45
-    assert room_pulse["liveMetrics"]["utilizationRate"] == 0.75
+    mock_redis.setex.assert_called_once()
+    assert json.loads(mock_redis.setex.call_args[0][2]) == result
+
+def test_room_utilization():
+    """Test utilization for empty, partly full, overfull and zero-capacity rooms."""
+    
+    from api.intelligence import _room_utilization
+    
+    assert _room_utilization(None, 60) == 0.0
+    assert _room_utilization(0, 60) == 0.0
+    assert _room_utilization(45, 60) == 0.75
+    assert _room_utilization(90, 60) == 1.0
+    assert _room_utilization(10, 0) == 0.0
 
 # Test community network endpoint
 @pytest.mark.asyncio
@@ -114,12 +207,11 @@ async def test_get_community_network(mock_jwt_payload, mock_redis, mock_db_conne
         }
     ]
     
-    mock_db_connection.fetch = AsyncMock(side_effect=[mock_members, mock_connections])
+    mock_db_connection.cursor = MagicMock(
+        side_effect=[async_rows(mock_members), async_rows(mock_connections)]
+    )
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                result = await get_community_network(30, mock_jwt_payload)
+    result = response_json(await get_community_network(30, mock_jwt_payload, mock_redis))
     
     assert len(result["nodes"]) == 1
     assert result["nodes"][0]["id"] == "member_123"
@@ -150,10 +242,7 @@ async def test_get_live_analytics(mock_jwt_payload, mock_redis, mock_db_connecti
     
     mock_db_connection.fetch = AsyncMock(side_effect=[mock_trending, mock_floor_activity])
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                result = await get_live_analytics(mock_jwt_payload)
+    result = response_json(await get_live_analytics(mock_jwt_payload, mock_redis))
     
     assert result["tower"]["activeMembers"] == 127
     assert result["tower"]["liveEvents"] == 3
@@ -190,10 +279,7 @@ async def test_get_revenue_optimization(mock_jwt_payload, mock_redis, mock_db_co
     
     mock_db_connection.fetch = AsyncMock(side_effect=[mock_opportunities, mock_floor_util])
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                result = await get_revenue_optimization(mock_jwt_payload)
+    result = response_json(await get_revenue_optimization(mock_jwt_payload, mock_redis))
     
     assert len(result["opportunities"]) == 1
     assert result["opportunities"][0]["timeSlot"] == "Tuesday 18:00-20:00"
@@ -224,12 +310,9 @@ async def test_query_bot(mock_jwt_payload, mock_redis, mock_db_connection):
     
     mock_db_connection.fetch = AsyncMock(return_value=mock_floor_data)
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                from api.intelligence import BotQuery
-                bot_query = BotQuery(**query)
-                result = await query_bot(bot_query, mock_jwt_payload)
+    from api.intelligence import BotQuery
+    bot_query = BotQuery(**query)
+    result = response_json(await query_bot(bot_query, mock_jwt_payload, mock_redis))
     
     assert "Floor 9 pulse" in result["message"]
     assert "8.5/10" in result["message"]
@@ -242,23 +325,54 @@ async def test_rate_limiting(mock_jwt_payload, mock_redis, mock_db_connection):
     """Test rate limiting functionality."""
     
     # Simulate rate limit exceeded
-    mock_redis.incr = AsyncMock(return_value=181)  # Over limit of 180
+    mock_redis.evalsha = AsyncMock(return_value=181)  # Over limit of 180
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                with pytest.raises(Exception) as exc_info:
-                    await get_floor_pulse(16, mock_jwt_payload)
+    with pytest.raises(HTTPException) as exc_info:
+        await get_floor_pulse(16, mock_jwt_payload, mock_redis)
                 
-                # Check that it raised an HTTPException with 429 status
-                assert "429" in str(exc_info.value) or "Rate limit" in str(exc_info.value)
+    # Check that it raised an HTTPException with 429 status
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.detail == "Rate limit exceeded"
+
+@pytest.mark.asyncio
+async def test_bot_rate_limit_is_local(mock_jwt_payload, mock_redis, mock_db_connection):
+    """Test that bot queries are limited in-process without a Redis counter."""
+    
+    from api.intelligence import BotQuery
+    bot_query = BotQuery(chatId="burst_chat", message="hello")
+    mock_redis.get = AsyncMock(return_value=b'{"message": "cached"}')
+    
+    for _ in range(15):
+        await query_bot(bot_query, mock_jwt_payload, mock_redis)
+            
+    with pytest.raises(HTTPException) as exc_info:
+        await query_bot(bot_query, mock_jwt_payload, mock_redis)
+    
+    assert exc_info.value.status_code == 429
+    mock_redis.evalsha.assert_not_called()
+
+def test_token_buckets_stay_bounded():
+    """Test that unique keys can't grow the local limiter past max_size."""
+    
+    from api.intelligence import TokenBucketLimiter
+    
+    limiter = TokenBucketLimiter(max_size=100)
+    limiter.allow("active", 2, 60)
+    limiter.allow("active", 2, 60)
+    
+    for i in range(1000):
+        assert limiter.allow(f"chat-{i}", 15, 60)
+        limiter.allow("active", 2, 60)  # recently used keys are kept
+        assert len(limiter._buckets) <= 100
+    
+    assert not limiter.allow("active", 2, 60)
 
 # Test caching behavior
 @pytest.mark.asyncio
 async def test_caching(mock_jwt_payload, mock_redis, mock_db_connection):
     """Test that cached responses are returned."""
     
-    cached_data = json.dumps([
+    cached_data = orjson.dumps([
         {
             "roomId": "cached_room",
             "roomName": "Cached Room",
@@ -275,16 +389,76 @@ async def test_caching(mock_jwt_payload, mock_redis, mock_db_connection):
     
     mock_redis.get = AsyncMock(return_value=cached_data)
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                result = await get_floor_pulse(16, mock_jwt_payload)
+    result = response_json(await get_floor_pulse(16, mock_jwt_payload, mock_redis))
     
     # Should return cached data without hitting database
     assert len(result) == 1
     assert result[0]["roomId"] == "cached_room"
     mock_db_connection.fetch.assert_not_called()
 
+# Test cache stampede protection
+@pytest.mark.asyncio
+async def test_cache_fill_waits_for_lock_holder(mock_jwt_payload, mock_redis, mock_db_connection):
+    """Test that a request losing the fill lock uses the published payload."""
+    
+    from api.intelligence import close_cache_fill_waiter
+    
+    filled = orjson.dumps({"tower": {"activeMembers": 7}, "trendingTopics": [], "floorActivity": []})
+    messages = [{"type": "pmessage", "channel": b"cache-ready:intel:live", "data": filled}]
+    
+    async def get_message(**kwargs):
+        await asyncio.sleep(0.01)
+        return messages.pop() if messages else None
+    
+    pubsub_mock = AsyncMock()
+    pubsub_mock.get_message = get_message
+    mock_redis.pubsub = MagicMock(return_value=pubsub_mock)
+    mock_redis.set = AsyncMock(return_value=None)  # another request holds the lock
+    
+    try:
+        result = response_json(await get_live_analytics(mock_jwt_payload, mock_redis))
+    finally:
+        await close_cache_fill_waiter()
+    
+    assert result["tower"]["activeMembers"] == 7
+    pubsub_mock.psubscribe.assert_awaited_once_with("cache-ready:*")
+    mock_db_connection.fetchval.assert_not_called()
+    mock_redis.setex.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fill(mock_redis):
+    """Test that concurrent cache misses in one process compute once."""
+    
+    from api.intelligence import compute_once
+    
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"[]"
+    
+    results = await asyncio.gather(*(compute_once(mock_redis, "intel:test", 30, compute) for _ in range(20)))
+    
+    assert results == [b"[]"] * 20
+    assert calls == 1
+    mock_redis.set.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_cache_fill_releases_only_its_own_lock(mock_jwt_payload, mock_redis, mock_db_connection):
+    """Test that the fill lock is released by token, not with a blind DEL."""
+    
+    from api.intelligence import UNLOCK_SHA
+    
+    mock_db_connection.fetch = AsyncMock(return_value=[])
+    await get_floor_pulse(16, mock_jwt_payload, mock_redis)
+    
+    lock_key, token = mock_redis.set.call_args[0]
+    assert lock_key == "lock:intel:pulse:16"
+    mock_redis.evalsha.assert_any_call(UNLOCK_SHA, 1, lock_key, token)
+    mock_redis.delete.assert_not_called()
+
 # Test WebSocket publishing
 @pytest.mark.asyncio
 async def test_bot_query_publishes_to_websocket(mock_jwt_payload, mock_redis, mock_db_connection):
@@ -297,12 +471,9 @@ async def test_bot_query_publishes_to_websocket(mock_jwt_payload, mock_redis, mo
     
     mock_db_connection.fetchval = AsyncMock(return_value=5)
     
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                from api.intelligence import BotQuery
-                bot_query = BotQuery(**query)
-                await query_bot(bot_query, mock_jwt_payload)
+    from api.intelligence import BotQuery
+    bot_query = BotQuery(**query)
+    await query_bot(bot_query, mock_jwt_payload, mock_redis)
     
     # Check that publish was called
     mock_redis.publish.assert_called()
@@ -318,14 +489,11 @@ async def test_json_format_compliance(mock_jwt_payload, mock_redis, mock_db_conn
     """Test that all endpoints return exact JSON formats as specified."""
     
     # Test floor pulse format
-    mock_rooms = [{'id': 'f16r1', 'name': 'Lounge', 'x': 45, 'y': 42, 'width': 25, 'height': 30, 'capacity': 60}]
-    mock_events = []
-    mock_db_connection.fetch = AsyncMock(side_effect=[mock_rooms, mock_events])
-    
-    with patch('api.intelligence.get_redis', return_value=mock_redis):
-        with patch('api.intelligence.get_db_connection', return_value=mock_db_connection):
-            with patch('api.intelligence.verify_jwt', return_value=mock_jwt_payload):
-                result = await get_floor_pulse(16, mock_jwt_payload)
+    mock_rooms = [{'id': 'f16r1', 'name': 'Lounge', 'x': 45, 'y': 42, 'width': 25, 'height': 30, 'capacity': 60,
+                   'event_id': None, 'title': None, 'tags': None, 'attendee_count': 0}]
+    mock_db_connection.fetch = AsyncMock(return_value=mock_rooms)
+    
+    result = response_json(await get_floor_pulse(16, mock_jwt_payload, mock_redis))
     
     # Verify exact structure
     assert isinstance(result, list)
@@ -0,0 +1,201 @@
+"""Tests for Frontier Tower WebSocket broadcasting."""
+
+import asyncio
+import itertools
+
+import pytest
+
+from api import websocket as ws
+
+class FakePubSub:
+    """Replays scripted pubsub messages; None once the script runs out."""
+
+    def __init__(self, messages):
+        self.messages = iter(messages)
+        self.reads = 0
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        self.reads += 1
+        await asyncio.sleep(0)
+        return next(self.messages, None)
+
+def pmessage(channel: str, data: bytes) -> dict:
+    return {"type": "pmessage", "pattern": None, "channel": channel.encode(), "data": data}
+
+@pytest.fixture
+def subscribed():
+    """Register a placeholder socket on the tower feed for the duration of a test."""
+    sock = object()
+    ws.manager.active_connections["tower-ai-feed"].add(sock)
+    yield sock
+    ws.manager.active_connections["tower-ai-feed"].discard(sock)
+
+# Test listener bursts
+@pytest.mark.asyncio
+async def test_burst_ends_during_unsubscribed_stream(subscribed):
+    """Test that a busy channel nobody here listens to can't hold a burst open."""
+
+    pubsub = FakePubSub(itertools.chain(
+        [pmessage("tower-ai-feed", b'{"type":"live_metrics"}')],
+        itertools.repeat(pmessage("floor-pulse-15", b'{"type":"floor_pulse"}')),
+    ))
+
+    batches = await asyncio.wait_for(ws._read_burst(pubsub), 1)
+
+    assert batches == {"tower-ai-feed": [b'{"type":"live_metrics"}']}
+    assert pubsub.reads == ws.LISTENER_BATCH_SIZE
+
+@pytest.mark.asyncio
+async def test_burst_delivers_remote_message_among_local_echoes(subscribed):
+    """Test that this node's own echoes are dropped without delaying remote messages."""
+
+    echo = pmessage("tower-ai-feed", ws._LOCAL_PREFIX + b',"type":"bot_response"}')
+    remote = pmessage("tower-ai-feed", b'{"node":"other","type":"bot_response"}')
+    pubsub = FakePubSub(itertools.chain([echo, echo, remote], itertools.repeat(echo)))
+
+    batches = await asyncio.wait_for(ws._read_burst(pubsub), 1)
+
+    assert batches == {"tower-ai-feed": [remote["data"]]}
+
+class FakeWebSocket:
+    """Records what the server sends and closes; send_text can be made to stall."""
+
+    def __init__(self, stall: bool = False):
+        self.sent = []
+        self.closed = []
+        self.stall = stall
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed.append(code)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def publish(self, channel, message):
+        self.commands.append((channel, message))
+
+    async def execute(self):
+        self.client.executed.append(self.commands)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeRedis:
+    def __init__(self):
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+async def settle():
+    """Let writer tasks run until they block."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+# Test per-connection send queues
+@pytest.mark.asyncio
+async def test_full_queue_closes_slow_client():
+    """Test that a client that stops reading is closed with 1013 and unsubscribed."""
+
+    manager = ws.ConnectionManager()
+    sock = FakeWebSocket(stall=True)
+    await manager.connect(sock, "tower-ai-feed")
+
+    for i in range(ws.WS_SEND_QUEUE_SIZE + 2):
+        await manager.broadcast("tower-ai-feed", f'{{"i":{i}}}')
+        await settle()
+
+    assert sock.closed == [1013]
+    assert len(manager.active_connections["tower-ai-feed"]) == 0
+    assert sock not in manager.queues
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_queued_frames_are_coalesced():
+    """Test that messages queued behind one send go out as one flattened array frame."""
+
+    manager = ws.ConnectionManager()
+    sock = FakeWebSocket()
+    await manager.connect(sock, "tower-ai-feed")
+
+    await manager.broadcast("tower-ai-feed", '{"a":1}')
+    await manager.broadcast("tower-ai-feed", b'[{"b":2},{"c":3}]')
+    await manager.send_personal_message('{"d":4}', sock)
+    await settle()
+
+    assert sock.sent == ['[{"a":1},{"b":2},{"c":3},{"d":4}]']
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_writer():
+    """Test that disconnecting stops the connection's writer task."""
+
+    manager = ws.ConnectionManager()
+    sock = FakeWebSocket()
+    await manager.connect(sock, "tower-ai-feed")
+    writer = manager.writers[sock]
+
+    manager.disconnect(sock)
+    await settle()
+
+    assert writer.cancelled()
+    assert sock not in manager.writers
+
+@pytest.mark.asyncio
+async def test_close_cancels_writers_and_pending_closes():
+    """Test that shutdown cancels writer tasks and slow-client closes still in flight."""
+
+    manager = ws.ConnectionManager()
+    sock = FakeWebSocket()
+    await manager.connect(sock, "tower-ai-feed")
+    writer = manager.writers[sock]
+    pending = asyncio.create_task(asyncio.Event().wait())
+    manager._closing.add(pending)
+
+    await manager.close()
+
+    assert writer.cancelled()
+    assert pending.cancelled()
+    assert not manager.writers
+
+# Test publish batching
+@pytest.mark.asyncio
+async def test_publish_worker_pipelines_queued_messages(monkeypatch):
+    """Test that queued publishes reach Redis in a single pipeline."""
+
+    client = FakeRedis()
+
+    async def get_redis():
+        return client
+
+    monkeypatch.setattr(ws, "get_redis", get_redis)
+    # Other tests may have left publishes on the module-level queue
+    while not ws._publish_queue.empty():
+        ws._publish_queue.get_nowait()
+    messages = [("tower-ai-feed", f'{{"i":{i}}}'.encode()) for i in range(5)]
+    for message in messages:
+        ws._publish_queue.put_nowait(message)
+
+    worker = asyncio.create_task(ws.publish_worker())
+    for _ in range(100):
+        if client.executed:
+            break
+        await asyncio.sleep(ws.PUBLISH_LINGER)
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+
+    assert client.executed == [messages]
+    assert ws._publish_queue.empty()